@@ -0,0 +1,222 @@
+import argparse
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from engine import tactical_equity_ratios, tactical_level
+
+# --- Track A 백테스트: 래리 윌리엄스 변동성 돌파 ---
+# 진입가 = 당일 시가 + k x 전일 변동폭(고가-저가). 당일 고가가 진입가를 넘으면 진입가에 매수, 종가에 청산.
+# 투입 비중은 run_tactical_sim 과 같은 0.0/0.2/0.6/1.0 구간을 사용하며,
+# 강도(0~100)는 최근 lookback 일 중 돌파가 발생한 비율로 정의합니다 (당일 정보는 사용하지 않음).
+#
+# 데이터: <data_dir>/<TICKER>.csv 또는 .parquet (timestamp/date, open, high, low, close)
+# 분봉/일봉 모두 지원하며, 최초 1회 청크 단위로 컬럼별 .npy 캐시로 변환한 뒤 메모리 맵으로 읽어 청크 단위로 일봉 집계합니다.
+
+ohlc_columns = ['open', 'high', 'low', 'close']
+time_columns = ['timestamp', 'datetime', 'date', 'time']
+cache_dir_name = '.colcache'
+chunk_rows = 5_000_000
+read_chunk_rows = 1_000_000
+
+
+def find_sources(data_dir):
+    sources = {}
+    for fname in sorted(os.listdir(data_dir)):
+        ticker, ext = os.path.splitext(fname)
+        if ext in ('.csv', '.parquet'):
+            sources[ticker] = os.path.join(data_dir, fname)
+    return sources
+
+
+def read_chunks(path):
+    # 원본을 read_chunk_rows 행씩 읽음 (전체 파일을 한 번에 메모리에 올리지 않음)
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=read_chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=read_chunk_rows)
+
+
+def build_column_cache(path, cache_dir):
+    # 1) 청크마다 컬럼별 임시 파일(.raw.tmp)에 이어 쓰고, 2) 시간순이 아니면 정렬 인덱스로 재배치하여 .npy.tmp 로 옮긴 뒤
+    # 3) 모든 컬럼을 다 쓴 다음 이름을 바꿉니다. 유효성 기준인 ts.npy 를 마지막에 바꾸므로 중간에 중단된 변환은 다음 실행에서 다시 만듭니다.
+    # 정렬이 필요할 때만 시간/정렬 인덱스 두 컬럼(행당 16바이트)을 메모리에 올립니다.
+    os.makedirs(cache_dir, exist_ok=True)
+    columns = ['ts'] + ohlc_columns
+    raw = {c: os.path.join(cache_dir, f'{c}.raw.tmp') for c in columns}
+    tmp = {c: os.path.join(cache_dir, f'{c}.npy.tmp') for c in columns}
+    dtypes = {'ts': np.int64, **{c: np.float64 for c in ohlc_columns}}
+    try:
+        n, ordered, last = 0, True, None
+        files = {c: open(raw[c], 'wb') for c in columns}
+        try:
+            for df in read_chunks(path):
+                df.columns = [str(c).lower() for c in df.columns]
+                time_col = next((c for c in time_columns if c in df.columns), None)
+                if time_col is None:
+                    raise ValueError(f"{path}: 시간 컬럼({', '.join(time_columns)})이 없습니다.")
+                missing = [c for c in ohlc_columns if c not in df.columns]
+                if missing:
+                    raise ValueError(f"{path}: 필요한 컬럼이 없습니다: {', '.join(missing)}")
+                if df.empty:
+                    continue
+                ts = pd.to_datetime(df[time_col]).to_numpy('datetime64[s]').astype(np.int64)
+                ordered = ordered and bool(np.all(ts[1:] >= ts[:-1])) and (last is None or ts[0] >= last)
+                last = ts[-1]
+                files['ts'].write(ts.tobytes())
+                for c in ohlc_columns:
+                    files[c].write(df[c].to_numpy(np.float64).tobytes())
+                n += len(ts)
+        finally:
+            for f in files.values():
+                f.close()
+        if n == 0:
+            raise ValueError(f"{path}: 데이터 행이 없습니다.")
+
+        order = None if ordered else np.argsort(np.memmap(raw['ts'], dtype=np.int64, mode='r', shape=(n,)), kind='stable')
+        for c in columns:
+            src = np.memmap(raw[c], dtype=dtypes[c], mode='r', shape=(n,))
+            out = np.lib.format.open_memmap(tmp[c], mode='w+', dtype=dtypes[c], shape=(n,))
+            for pos in range(0, n, chunk_rows):
+                out[pos:pos + chunk_rows] = src[pos:pos + chunk_rows] if order is None else src[order[pos:pos + chunk_rows]]
+            out.flush()
+            del out, src
+        for c in ohlc_columns + ['ts']:
+            os.replace(tmp[c], os.path.join(cache_dir, f'{c}.npy'))
+    finally:
+        for leftover in list(raw.values()) + list(tmp.values()):
+            if os.path.exists(leftover):
+                os.unlink(leftover)
+
+
+def open_columns(path):
+    # 원본보다 오래된 캐시는 다시 생성
+    cache_dir = os.path.join(os.path.dirname(path), cache_dir_name, os.path.basename(path))
+    ts_file = os.path.join(cache_dir, 'ts.npy')
+    if not os.path.exists(ts_file) or os.path.getmtime(ts_file) < os.path.getmtime(path):
+        build_column_cache(path, cache_dir)
+    return {c: np.load(os.path.join(cache_dir, f'{c}.npy'), mmap_mode='r') for c in ['ts'] + ohlc_columns}
+
+
+def daily_bars(cols):
+    # 일(day) 경계가 청크에 걸치지 않도록 잘라가며 reduceat 으로 일봉 집계
+    n = len(cols['ts'])
+    parts = []
+    pos = 0
+    while pos < n:
+        end = min(n, pos + chunk_rows)
+        if end < n:
+            day_start = (cols['ts'][end] // 86400) * 86400
+            boundary = int(np.searchsorted(cols['ts'], day_start))
+            # 하루 데이터가 청크보다 길면 그 날의 끝까지 확장
+            end = boundary if boundary > pos else int(np.searchsorted(cols['ts'], day_start + 86400))
+        day = cols['ts'][pos:end] // 86400
+        starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        parts.append((
+            day[starts],
+            np.asarray(cols['open'][pos:end])[starts],
+            np.maximum.reduceat(cols['high'][pos:end], starts),
+            np.minimum.reduceat(cols['low'][pos:end], starts),
+            np.asarray(cols['close'][pos:end])[np.r_[starts[1:] - 1, end - pos - 1]],
+        ))
+        pos = end
+    return [np.concatenate(p) for p in zip(*parts)]
+
+
+def load_panel(data_dir, tickers=None):
+    # 모든 종목을 (일자 x 종목) 2차원 배열로 정렬 - 거래가 없는 날은 NaN
+    sources = find_sources(data_dir)
+    if tickers:
+        sources = {t: sources[t] for t in tickers if t in sources}
+    if not sources:
+        raise ValueError(f"{data_dir}: 읽을 수 있는 OHLC 파일이 없습니다.")
+
+    bars = {t: daily_bars(open_columns(p)) for t, p in sources.items()}
+    days = np.unique(np.concatenate([b[0] for b in bars.values()]))
+    panel = {c: np.full((len(days), len(bars)), np.nan) for c in ohlc_columns}
+    for j, b in enumerate(bars.values()):
+        rows = np.searchsorted(days, b[0])
+        for c, values in zip(ohlc_columns, b[1:]):
+            panel[c][rows, j] = values
+    dates = pd.to_datetime(days * 86400, unit='s')
+    return dates, list(bars), panel
+
+
+def breakout_strength(triggered, lookback):
+    # 직전 lookback 일 중 돌파 발생 비율 (0~100), 당일은 제외 - 이력이 없으면 중립(50)
+    hits = np.vstack([np.zeros((1, triggered.shape[1])), np.cumsum(triggered, axis=0)])
+    t = np.arange(len(triggered))
+    lo = np.maximum(t - lookback, 0)
+    counts = (t - lo)[:, None]
+    return np.where(counts > 0, (hits[t] - hits[lo]) / np.maximum(counts, 1) * 100, 50.0)
+
+
+def breakout_triggers(o, h, l, k):
+    # 진입가(당일 시가 + k x 전일 변동폭)와 당일 돌파 여부 - 첫 행은 전일 변동폭이 없으므로 돌파 없음
+    prev_range = np.concatenate([np.full((1,) + o.shape[1:], np.nan), (h - l)[:-1]])
+    level = o + k * prev_range
+    return level, (h >= level) & np.isfinite(level)
+
+
+def run_backtest(dates, tickers, panel, k=0.5, lookback=20, fee_bps=5.0):
+    o, h, l, c = (panel[col] for col in ohlc_columns)
+    level, triggered = breakout_triggers(o, h, l, k)
+
+    strength = breakout_strength(triggered, lookback)
+    ratio = tactical_equity_ratios[tactical_level(strength)]
+    entry = np.maximum(level, o)  # 시가가 이미 진입가 위에서 시작하면 시가 체결
+    trade_ret = c / entry - 1 - 2 * fee_bps / 10000
+    ret = np.where(triggered, ratio * trade_ret, 0.0)
+    ret[np.isnan(c)] = np.nan  # 상장 전/거래 없는 날은 포트폴리오 평균에서 제외
+
+    taken = triggered & (ratio > 0)
+    equity = pd.DataFrame(np.cumprod(1 + np.nan_to_num(ret), axis=0), index=dates, columns=tickers)
+    # 모든 종목이 거래가 없는 날은 평균이 NaN(-> 수익률 0) 이므로 빈 구간 경고를 숨김
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        equity['portfolio'] = np.cumprod(1 + np.nan_to_num(np.nanmean(ret, axis=1)))
+    n_trades = taken.sum(axis=0)
+    wins = (taken & (trade_ret > 0)).sum(axis=0)
+    stats = pd.DataFrame({
+        'trades': n_trades,
+        'hit_rate': np.where(n_trades > 0, wins / np.maximum(n_trades, 1), np.nan),
+        'turnover': (2 * ratio * taken).sum(axis=0) / max(len(dates) / 252, 1e-9),
+        'total_return': equity[tickers].iloc[-1].to_numpy() - 1,
+        'max_drawdown': (1 - equity[tickers] / equity[tickers].cummax()).max().to_numpy(),
+    }, index=tickers)
+    return equity, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track A 변동성 돌파 백테스트")
+    parser.add_argument('data_dir', help="종목별 OHLC 파일 폴더 (.csv / .parquet)")
+    parser.add_argument('--tickers', nargs='*', help="대상 종목 (기본: 폴더 내 전체)")
+    parser.add_argument('--k', type=float, default=0.5, help="돌파 계수 k (기본 0.5)")
+    parser.add_argument('--lookback', type=int, default=20, help="강도 산출 기간 (일)")
+    parser.add_argument('--fee-bps', type=float, default=5.0, help="편도 거래 비용 (bp)")
+    parser.add_argument('--out', help="자산 곡선 저장 파일 (.csv / .parquet)")
+    args = parser.parse_args(argv)
+
+    try:
+        dates, tickers, panel = load_panel(args.data_dir, args.tickers)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    equity, stats = run_backtest(dates, tickers, panel, args.k, args.lookback, args.fee_bps)
+    print(stats.to_string(float_format=lambda v: f"{v:,.3f}"))
+    print(f"\n포트폴리오 누적 수익률: {(equity['portfolio'].iloc[-1] - 1) * 100:.1f}%")
+    if args.out:
+        if args.out.endswith('.parquet'):
+            equity.to_parquet(args.out)
+        else:
+            equity.to_csv(args.out, encoding='utf-8-sig')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import argparse
+import sys
+
+import pandas as pd
+
+from engine import allocate_batch
+from optimizer import default_returns_path, optimize_universe, optimizer_modes
+from universe import default_universe_path, load_universe
+
+# --- 야간 배치: 고객 전체 북(Book)을 한 번에 배분 ---
+# 사용법: python batch_allocate.py clients.csv allocations.parquet
+# 입력 컬럼: capital, lw_strength, sentiment, consensus (+ 식별용 컬럼은 그대로 유지)
+
+input_columns = ['capital', 'lw_strength', 'sentiment', 'consensus']
+
+
+def read_table(path):
+    # 경로 또는 업로드 파일 객체(.name 보유) 모두 허용
+    if str(getattr(path, 'name', path)).endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_table(df, path):
+    if str(path).endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def run_batch(clients, universe=None):
+    missing = [c for c in input_columns if c not in clients.columns]
+    if missing:
+        raise ValueError(f"입력 파일에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+    result = allocate_batch(clients['capital'], clients['lw_strength'], clients['sentiment'], clients['consensus'], universe)
+    result.index = clients.index
+    return pd.concat([clients, result], axis=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Investment Master Model 배치 배분")
+    parser.add_argument('input', help="고객 입력 파일 (.csv / .parquet)")
+    parser.add_argument('output', help="배분 결과 파일 (.csv / .parquet)")
+    parser.add_argument('--universe', default=default_universe_path, help="종목 유니버스 파일 (.csv / .parquet)")
+    parser.add_argument('--optimize', choices=list(optimizer_modes), help="핵심 비중을 수익률 이력으로 최적화")
+    parser.add_argument('--returns', default=default_returns_path, help="최적화용 수익률 이력 파일")
+    parser.add_argument('--max-weight', type=float, default=1.0, help="최적화 시 종목별 최대 비중 (0~1)")
+    args = parser.parse_args(argv)
+
+    try:
+        universe = load_universe(args.universe)
+        if args.optimize:
+            universe = optimize_universe(universe, args.returns, args.optimize, upper=args.max_weight)
+        out = run_batch(read_table(args.input), universe)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    write_table(out, args.output)
+    print(f"{len(out):,}명 배분 완료 -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from profiling import read_runs
+
+# --- 헤드리스 벤치마크 ---
+# 브라우저 없이 streamlit.testing(AppTest)으로 investment_app.py 를 실행하여
+# 유니버스 규모(small / large)별로 첫 실행(cold), 같은 입력 재실행(warm), 슬라이더 변경(change) 의
+# 전체 소요 시간과 단계별 시간/메모리를 측정하고, 저장된 기준값 대비 느려지면 실패(종료 코드 1)합니다.
+# 사용법: python benchmark.py [--repeat 3] [--update-baseline]
+#
+# 기준값(data/benchmark_baseline.json)은 측정한 기기의 절대 시간이므로 저장소에 올리지 않는 로컬 파일입니다.
+# 각 기기에서 --update-baseline 으로 처음 한 번 만들며, 다른 환경(CPU 모델/코어 수/Python 버전)에서 만든 기준값과는
+# 비교 결과만 참고용으로 출력하고 실패로 처리하지 않습니다.
+#
+# 시나리오마다 별도 프로세스에서 실행하므로 cold 에는 import 와 캐시 생성 비용이 모두 포함됩니다.
+# 메모리(단계별 tracemalloc 피크, 프로세스 최대 RSS)는 속도 측정을 왜곡하지 않도록 별도 1회 실행에서 잽니다.
+# 첫 화면 시간(first_render)은 cold 실행 기준으로 first_render_target_ms 를 넘으면 실패합니다.
+
+app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'investment_app.py')
+default_baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'benchmark_baseline.json')
+scenario_sizes = {'small': None, 'large': 5000}
+phases = ['cold', 'warm', 'change']
+min_delta_ms = 25.0      # 이보다 작은 차이는 측정 잡음으로 보고 무시
+min_delta_kb = 5 * 1024
+first_render_target_ms = 300.0  # cold 실행에서 첫 화면(제목 + 트랙 카드)까지 허용 시간
+
+
+def write_large_universe(path, n, seed=0):
+    rng = np.random.default_rng(seed)
+    weight = rng.pareto(1.5, n) + 0.01
+    pd.DataFrame({
+        'name': [f"종목 {i:05d}" for i in range(n)],
+        'weight': weight / weight.sum(),  # 유니버스 로더는 합계 1 이 아니면 거부
+        'type': rng.choice(['Strategic (Core)', 'Tactical', 'Buffer'], n, p=[0.8, 0.15, 0.05]),
+        'rationale': [f"[Bench] 합성 종목 {i} 의 투자 이유" for i in range(n)],
+    }).to_csv(path, index=False)
+
+
+# 자식 프로세스: 한 시나리오를 cold -> warm -> change 순서로 실행하고 결과를 JSON 으로 출력
+def run_scenario(trace_memory):
+    from streamlit.testing.v1 import AppTest
+
+    if trace_memory:
+        tracemalloc.start()
+    at = AppTest.from_file(app_path, default_timeout=600)
+    wall = {}
+    for phase in phases:
+        if phase == 'change':
+            at.sidebar.slider[0].set_value(85)
+        start = time.perf_counter()
+        at.run()
+        wall[phase] = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(f"{phase} 실행 중 예외: {at.exception[0].message}")
+    print(json.dumps({'wall_ms': wall, 'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def spawn(universe_path, trace_memory):
+    log = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False)
+    log.close()
+    # 실행 기록은 임시 저장소에 쓰고 끝나면 삭제 (저장소 크기가 측정에 영향을 주지 않도록)
+    env = {**os.environ, 'PF_PROFILE': '1', 'PF_PROFILE_LOG': log.name, 'PF_RUNSTORE': log.name + '.sqlite'}
+    if universe_path:
+        env['PF_UNIVERSE'] = universe_path
+    cmd = [sys.executable, os.path.abspath(__file__), '--child'] + (['--trace-memory'] if trace_memory else [])
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    try:
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "벤치마크 실행 실패")
+        out = json.loads(proc.stdout.strip().splitlines()[-1])
+        out['runs'] = read_runs(log.name)
+    finally:
+        for leftover in (log.name, log.name + '.sqlite', log.name + '.sqlite-wal', log.name + '.sqlite-shm'):
+            if os.path.exists(leftover):
+                os.unlink(leftover)
+    if len(out['runs']) != len(phases):
+        raise RuntimeError(f"단계 기록이 {len(out['runs'])}건입니다 (예상 {len(phases)}건).")
+    return out
+
+
+def measure(universe_path, repeat):
+    samples = [spawn(universe_path, False) for _ in range(repeat)]
+    mem = spawn(universe_path, True)
+    result = {}
+    for i, phase in enumerate(phases):
+        stages = pd.DataFrame([{s['stage']: s['ms'] for s in out['runs'][i]['stages']} for out in samples])
+        result[phase] = {
+            'wall_ms': round(float(np.median([out['wall_ms'][phase] for out in samples])), 2),
+            'first_render_ms': round(float(np.median([out['runs'][i]['marks']['first_render'] for out in samples])), 2),
+            'stages_ms': stages.median().round(2).to_dict(),
+            'peak_kb': {s['stage']: round(s['peak_kb'], 1) for s in mem['runs'][i]['stages']},
+        }
+    result['max_rss_kb'] = mem['max_rss_kb']
+    return result
+
+
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            return next((line.split(':', 1)[1].strip() for line in f if line.startswith('model name')), platform.processor())
+    except OSError:
+        return platform.processor()
+
+
+# 같은 기기 판정에 쓰는 항목 - platform() 은 커널/배포판 패치 버전까지 포함해 같은 기기에서도 바뀌므로 기록만 하고 비교하지 않음
+machine_fields = ('cpu', 'cpus', 'python')
+
+
+def machine_info():
+    # 기준값을 측정한 환경 (호스트 이름은 컨테이너마다 바뀌므로 제외)
+    return {'platform': platform.platform(), 'cpu': cpu_model(), 'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+
+def same_machine(recorded, current):
+    return recorded is not None and all(recorded.get(k) == current.get(k) for k in machine_fields)
+
+
+def compare(current, baseline, threshold):
+    # (시나리오, 단계, 항목, 기준값, 현재값) 중 기준 대비 threshold 이상 + 최소 차이 이상 느려진/커진 항목
+    regressions = []
+    for scenario, phases_now in current.items():
+        base = baseline.get(scenario, {})
+        for phase in phases:
+            now, old = phases_now[phase], base.get(phase)
+            if old is None:
+                continue
+            checks = [('wall', old['wall_ms'], now['wall_ms'], min_delta_ms)]
+            if 'first_render_ms' in old:
+                checks.append(('first_render', old['first_render_ms'], now['first_render_ms'], min_delta_ms))
+            checks += [(f"{k} ms", old['stages_ms'][k], v, min_delta_ms) for k, v in now['stages_ms'].items() if k in old['stages_ms']]
+            checks += [(f"{k} KB", old['peak_kb'][k], v, min_delta_kb) for k, v in now['peak_kb'].items() if k in old['peak_kb']]
+            for name, b, c, floor in checks:
+                if c > b * (1 + threshold) and c - b > floor:
+                    regressions.append((scenario, phase, name, b, c))
+    return regressions
+
+
+def report(current):
+    for scenario, res in current.items():
+        print(f"\n[{scenario}] 최대 RSS {res['max_rss_kb'] / 1024:,.0f} MB")
+        table = pd.DataFrame({phase: pd.Series(res[phase]['stages_ms']) for phase in phases})
+        table.loc['(first_render)'] = [res[phase]['first_render_ms'] for phase in phases]
+        table.loc['(wall)'] = [res[phase]['wall_ms'] for phase in phases]
+        table['cold_peak_kb'] = pd.Series(res['cold']['peak_kb'])
+        print(table.round(1).to_string())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="investment_app.py 헤드리스 벤치마크")
+    parser.add_argument('--repeat', type=int, default=3, help="시나리오별 반복 횟수 (중앙값 사용)")
+    parser.add_argument('--scenarios', nargs='+', default=list(scenario_sizes), choices=list(scenario_sizes))
+    parser.add_argument('--baseline', default=default_baseline_path, help="기준값 파일 (.json)")
+    parser.add_argument('--threshold', type=float, default=0.5, help="허용 악화 비율 (0.5 = 50%%)")
+    parser.add_argument('--first-render-target', type=float, default=first_render_target_ms, help="cold 첫 화면 목표 시간 (ms)")
+    parser.add_argument('--update-baseline', action='store_true', help="현재 결과를 기준값으로 저장")
+    parser.add_argument('--output', help="측정 결과 저장 경로 (.json)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--trace-memory', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_scenario(args.trace_memory)
+        return 0
+
+    current = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scenario in args.scenarios:
+            path = None
+            if scenario_sizes[scenario]:
+                path = os.path.join(tmp, f"{scenario}_universe.csv")
+                write_large_universe(path, scenario_sizes[scenario])
+            try:
+                current[scenario] = measure(path, args.repeat)
+            except RuntimeError as e:
+                print(f"{scenario}: {e}", file=sys.stderr)
+                return 1
+    report(current)
+    slow = {name: res['cold']['first_render_ms'] for name, res in current.items() if res['cold']['first_render_ms'] > args.first_render_target}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    # 기준값은 첫 화면 목표 초과 여부와 관계없이 저장 (목표 초과는 저장 후에 실패로 보고)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**current, 'machine': machine_info()}, f, ensure_ascii=False, indent=2)
+        print(f"\n기준값 저장 -> {args.baseline}")
+    if slow:
+        print(f"\n첫 화면 목표({args.first_render_target:,.0f} ms) 초과: " + ", ".join(f"{k} {v:,.1f} ms" for k, v in slow.items()))
+        return 1
+    if args.update_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\n기준값 파일이 없습니다: {args.baseline} (--update-baseline 으로 생성)")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    comparable = same_machine(baseline.get('machine'), machine_info())
+    if not comparable:
+        print("\n기준값이 다른 환경에서 측정되어 비교 결과는 참고용입니다 (이 환경에서 --update-baseline 으로 다시 만드세요).")
+    if regressions:
+        print(f"\n기준 대비 {args.threshold:.0%} 이상 악화된 항목 {len(regressions)}건:")
+        for scenario, phase, name, b, c in regressions:
+            print(f"  {scenario}/{phase} {name}: {b:,.1f} -> {c:,.1f}")
+        return 1 if comparable else 0
+    print("\n기준값 대비 회귀 없음")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import numpy as np
+import pandas as pd
+
+from engine import consensus_grid, lw_grid, sentiment_grid, strategic_levels, tactical_levels
+
+# --- Plotly 차트 생성 (Streamlit 비의존) ---
+# investment_app.py 에서 입력값 기준으로 캐시하여 재사용합니다.
+# plotly 는 import 비용이 크므로 모듈 최상단이 아니라 차트를 실제로 만들 때 가져옵니다 (콜드 스타트 단축).
+
+type_colors = {
+    'Strategic (Core)': '#F59E0B', # Amber
+    'Tactical': '#EF4444',        # Red
+    'Buffer': '#3B82F6'           # Blue
+}
+
+
+def dark_layout(fig, **kwargs):
+    fig.update_layout(
+        template='plotly_dark',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#FFFFFF'), # 차트 폰트 흰색으로 변경
+        **kwargs
+    )
+    return fig
+
+
+# 통합 포트폴리오 막대 차트 (비중 % 표시)
+# 종목 수가 large_universe_threshold 를 넘으면 상위 top_n 종목 + 유형별 '기타' 묶음으로 집계하여
+# 막대 수(=그림 JSON 크기)를 일정하게 유지합니다. 묶음은 클릭 시 group_detail_figure 로 펼쳐 봅니다.
+large_universe_threshold = 40
+top_n = 25
+max_detail_points = 5000
+
+
+def aggregate_portfolio(df_pf, top_n=top_n):
+    ordered = df_pf.sort_values('금액', ascending=False)
+    top = ordered.iloc[:top_n][['종목', '금액', '비중', '유형']].assign(group=None)
+    others = (ordered.iloc[top_n:]
+              .groupby('유형', observed=True)
+              .agg(금액=('금액', 'sum'), 비중=('비중', 'sum'), count=('종목', 'size'))
+              .reset_index())
+    others['종목'] = [f"기타 {kind} ({n:,}종목)" for kind, n in zip(others['유형'], others['count'])]
+    others['group'] = others['유형'].astype(str)
+    return pd.concat([top, others[['종목', '금액', '비중', '유형', 'group']]], ignore_index=True)
+
+
+def portfolio_bar_figure(df_pf):
+    import plotly.express as px
+    large = len(df_pf) > large_universe_threshold
+    data = aggregate_portfolio(df_pf) if large else df_pf
+    fig_bar = px.bar(
+        data,
+        x='비중',
+        y='종목',
+        orientation='h',
+        text='비중', # 비중을 텍스트로 표시
+        color='유형',
+        color_discrete_map=type_colors,
+        template='plotly_dark'
+    )
+    # 텍스트 포맷팅 (XX.X%)
+    fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    return dark_layout(
+        fig_bar,
+        yaxis={'categoryorder':'total ascending', 'title': None},
+        xaxis={'title': '비중 (%)'},
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=max(500, 22 * len(data)) if large else 500
+    )
+
+
+# '기타' 묶음 상세: 순위별 비중 분포를 WebGL(Scattergl)로 그리고, 점 수는 max_detail_points 로 제한
+def group_detail_figure(df_pf, kind, top_n=top_n):
+    import plotly.graph_objects as go
+    ordered = df_pf.sort_values('금액', ascending=False)
+    members = ordered.iloc[top_n:]
+    members = members[members['유형'] == kind]
+    rank = np.arange(top_n + 1, top_n + 1 + len(members))
+    if len(members) > max_detail_points:
+        keep = np.unique(np.linspace(0, len(members) - 1, max_detail_points).astype(int))
+        members, rank = members.iloc[keep], rank[keep]
+
+    fig = go.Figure(go.Scattergl(
+        x=rank, y=members['비중'], text=members['종목'], mode='markers',
+        marker=dict(size=5, color=type_colors.get(kind, '#94A3B8')),
+        hovertemplate="%{text}<br>순위 %{x:,}<br>비중 %{y:.3f}%<extra></extra>"
+    ))
+    return dark_layout(
+        fig,
+        title=f"기타 {kind} 상세 ({len(members):,}개 표시)",
+        xaxis={'title': '금액 순위'},
+        yaxis={'title': '비중 (%)', 'type': 'log'},
+        margin=dict(l=0, r=0, t=40, b=0),
+        height=350
+    )
+
+
+# 배분 지도 (LW x 심리, 컨센서스 고정 단면)
+def sweep_heatmap_figure(surface, consensus):
+    import plotly.graph_objects as go
+    c = list(consensus_grid).index(consensus)
+    z = surface['equity_ratio'][:, :, c] * 100
+    tac_names = [lv[1] for lv in tactical_levels]
+    str_names = [lv[1] for lv in strategic_levels]
+    hover = [[f"{tac_names[surface['tac_level'][i, j, c]]}<br>{str_names[surface['str_level'][i, j, c]]}"
+              for j in range(len(sentiment_grid))] for i in range(len(lw_grid))]
+
+    fig = go.Figure(go.Heatmap(
+        x=sentiment_grid, y=lw_grid, z=z,
+        customdata=surface['equity'][0, :, :, c] / 100000000,
+        text=hover,
+        hovertemplate="심리 %{x} / LW %{y}<br>주식 %{z:.0f}% (%{customdata:.2f}억)<br>%{text}<extra></extra>",
+        colorscale=[[0, '#3B82F6'], [0.5, '#94A3B8'], [1, '#F59E0B']],
+        colorbar=dict(title='주식 %')
+    ))
+    return dark_layout(
+        fig,
+        xaxis={'title': '대중 심리 (Fear/Greed)'},
+        yaxis={'title': 'LW 변동성 돌파 강도'},
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=450
+    )
+
+
+# 백분위 밴드 (5~95, 25~75) + 중앙값 선
+def add_fan(fig, x, fan, rgb, name="중앙값", text=None):
+    import plotly.graph_objects as go
+    for lo, hi, alpha in [(5, 95, 0.15), (25, 75, 0.3)]:
+        fig.add_trace(go.Scatter(x=x, y=fan[hi], mode='lines', line=dict(width=0), hoverinfo='skip', showlegend=False))
+        fig.add_trace(go.Scatter(
+            x=x, y=fan[lo], mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor=f'rgba({rgb}, {alpha})', name=f"{lo}~{hi}%"
+        ))
+    fig.add_trace(go.Scatter(
+        x=x, y=fan[50], mode='lines+markers+text' if text else 'lines', name=name,
+        text=text, textposition="top center",
+        line=dict(color=f'rgb({rgb})', width=3)
+    ))
+    return fig
+
+
+# 몬테카를로 팬 차트 (fan: 백분위 -> 초기 대비 배수 배열)
+def projection_fan_figure(fan, capital, steps_per_year):
+    import plotly.graph_objects as go
+    x = [t / steps_per_year for t in range(len(fan[50]))]
+    fan = {p: capital * v / 100000000 for p, v in fan.items()}
+    return dark_layout(
+        add_fan(go.Figure(), x, fan, '245, 158, 11'),
+        xaxis={'title': '경과 기간 (년)'},
+        yaxis={'title': '포트폴리오 가치 (억)'},
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=450
+    )
+
+
+# 부동산 가치 시나리오 차트 (누적 임대 수익 포함, 개발 일정 시점에 중앙값 표시)
+def real_estate_figure(result, milestones):
+    import plotly.graph_objects as go
+    years = list(result['years'])
+    fan = {p: v / 100000000 for p, v in result['total'].items()}
+    text = [f"{milestones[y]} {v:.1f}억" if y in milestones else "" for y, v in zip(years, fan[50])]
+    return dark_layout(
+        add_fan(go.Figure(), years, fan, '245, 158, 11', text=text),
+        title="예상 가치 시나리오 (단위: 억, 누적 임대 수익 포함)",
+        xaxis={'title': None, 'dtick': 1},
+        yaxis={'title': '가치 (억)'},
+        height=400
+    )
+
+
+# 금융 + 부동산 순자산 시나리오
+def net_worth_figure(result):
+    import plotly.graph_objects as go
+    years = list(result['years'])
+    fig = add_fan(go.Figure(), years, {p: v / 100000000 for p, v in result['net_worth'].items()}, '59, 130, 246', name="순자산 중앙값")
+    fig.add_trace(go.Scatter(x=years, y=result['financial'][50] / 100000000, mode='lines', name="금융 자산 중앙값",
+                             line=dict(color='#F59E0B', width=2, dash='dot')))
+    fig.add_trace(go.Scatter(x=years, y=result['total'][50] / 100000000, mode='lines', name="부동산 중앙값",
+                             line=dict(color='#94A3B8', width=2, dash='dot')))
+    return dark_layout(
+        fig,
+        title="통합 순자산 시나리오 (단위: 억)",
+        xaxis={'title': None, 'dtick': 1},
+        yaxis={'title': '순자산 (억)'},
+        height=400
+    )
+
+
+# 현재 입력 위치 표시 (캐시된 차트 위에 덧그림)
+def add_position_marker(fig, x, y):
+    import plotly.graph_objects as go
+    fig.add_trace(go.Scatter(
+        x=[x], y=[y], mode='markers',
+        marker=dict(size=14, color='#FFFFFF', symbol='x'),
+        hoverinfo='skip', showlegend=False
+    ))
+    return fig
+
+
+# 저장된 실행들의 비중 추이 (history: created, run_id, key, weight_pct - 시간순)
+# 같은 초에 저장된 실행도 구분되도록 x 축은 실행 순번, 저장 시각은 hover 로 표시
+def allocation_history_figure(history):
+    import plotly.graph_objects as go
+    order = pd.factorize(history['run_id'])[0] + 1
+    fig = go.Figure()
+    for key, rows in history.assign(order=order).groupby('key', sort=False):
+        fig.add_trace(go.Scatter(
+            x=rows['order'], y=rows['weight_pct'], mode='lines', name=str(key),
+            line=dict(color=type_colors.get(key)), customdata=rows['created'],
+            hovertemplate=f"{key}<br>%{{customdata}}<br>비중 %{{y:.1f}}%<extra></extra>"
+        ))
+    return dark_layout(
+        fig,
+        xaxis={'title': '실행 순번 (오래된 순)'},
+        yaxis={'title': '비중 (%)'},
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=400
+    )
+
+
+# 시장 데이터 신호 이력 (위: 신호 0~100, 아래: 신호대로 배분했을 때의 총 주식 비중)
+def signal_history_figure(inputs, equity_ratio):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.6, 0.4], vertical_spacing=0.06)
+    lines = [
+        ('LW 돌파 강도', inputs['lw_strength'], '#EF4444'),
+        ('대중 심리', inputs['sentiment'], '#F59E0B'),
+        ('컨센서스 (1~5 → 0~100)', (inputs['consensus'] - 1) * 25, '#3B82F6'),
+    ]
+    for name, values, color in lines:
+        fig.add_trace(go.Scatter(x=inputs.index, y=values, mode='lines', name=name, line=dict(color=color, width=1)), row=1, col=1)
+    fig.add_trace(go.Scatter(
+        x=inputs.index, y=equity_ratio * 100, mode='lines', name='총 주식 비중', line=dict(color='#FFFFFF', width=1, shape='hv'),
+        fill='tozeroy', fillcolor='rgba(148, 163, 184, 0.2)'
+    ), row=2, col=1)
+    fig.update_yaxes(title_text='신호', range=[0, 100], row=1, col=1)
+    fig.update_yaxes(title_text='주식 비중 (%)', range=[0, 100], row=2, col=1)
+    return dark_layout(
+        fig,
+        margin=dict(l=0, r=0, t=30, b=0),
+        legend=dict(orientation='h', y=1.08),
+        height=500
+    )
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+from universe import load_universe
+
+# --- 자산 배분 엔진 (Streamlit 비의존) ---
+# investment_app.py 와 배치 CLI 가 공통으로 사용하는 순수 계산 로직입니다.
+# 핵심(Core) 종목 구성은 universe.py 가 data/core_stocks.csv 에서 읽어옵니다.
+
+tactical_holding = {'name': '단기 트레이딩 (TQQQ 등)', 'type': 'Tactical', 'rationale': '[Momentum] 단기 변동성 돌파 전략 실행을 위한 레버리지 ETF 운용.'}
+cash_holding = {'name': '현금 (Cash Buffer)', 'type': 'Buffer', 'rationale': '[Option] 폭락장 대응 및 새로운 기회를 위한 현금성 자산.'}
+
+strategic_ratio = 0.8
+tactical_ratio = 0.2
+
+# 구간별 결과표: (주식 비중 또는 현금 비중, 신호, 색상) - 인덱스는 아래 *_level 함수의 반환값
+tactical_levels = [
+    (1.0, "🚀 강력 돌파 (Strong Breakout)", "#EF4444"),
+    (0.6, "📈 추세 추종 (Trend Following)", "#F97316"),
+    (0.0, "🛡️ 추세 붕괴 (Stop Loss)", "#3B82F6"),
+    (0.2, "👀 관망/탐색 (Watching)", "#94A3B8"),
+]
+strategic_levels = [
+    (0.30, "🚨 과열 (Reduce)", "#EF4444"),
+    (0.15, "⚠️ 경계 (Hold)", "#F97316"),
+    (0.0, "💎 바닥 (Buy)", "#3B82F6"),
+    (0.05, "⚖️ 균형 (Neutral)", "#94A3B8"),
+]
+
+tactical_equity_ratios = np.array([lv[0] for lv in tactical_levels])
+strategic_cash_ratios = np.array([lv[0] for lv in strategic_levels])
+
+
+def format_currency(value):
+    return f"₩{int(value):,}"
+
+
+# --- 벡터화 구간 판정 (스칼라/배열 모두 지원) ---
+def tactical_level(strength):
+    strength = np.asarray(strength)
+    return np.select([strength >= 80, strength >= 60, strength <= 20], [0, 1, 2], default=3)
+
+
+def strategic_risk_score(sent, ana):
+    return (np.asarray(sent) * 0.7) + ((np.asarray(ana) - 1) * 25 * 0.3)
+
+
+def strategic_level(sent, ana):
+    risk_score = strategic_risk_score(sent, ana)
+    return np.select([risk_score >= 80, risk_score >= 60, risk_score <= 20], [0, 1, 2], default=3)
+
+
+# 단기 전술 로직
+def tactical_allocation(level, capital):
+    equity_ratio, signal, signal_color = tactical_levels[level]
+    alloc = capital * tactical_ratio
+    return alloc * equity_ratio, alloc * (1 - equity_ratio), signal, signal_color
+
+
+def run_tactical_sim(strength, capital):
+    return tactical_allocation(int(tactical_level(strength)), capital)
+
+
+# 중기 전략 로직
+def strategic_allocation(level, capital):
+    target_cash, stance, stance_color = strategic_levels[level]
+    alloc = capital * strategic_ratio
+    cash = alloc * target_cash
+    stock = alloc - cash
+    return stock, cash, stance, stance_color
+
+
+def run_strategic_sim(sent, ana, capital):
+    return strategic_allocation(int(strategic_level(sent, ana)), capital)
+
+
+# 금융 포트폴리오 데이터 생성 (universe 가 없으면 기본 유니버스 파일 사용)
+def build_portfolio(capital, tac_stock, tac_cash, str_stock, str_cash, universe=None):
+    universe = load_universe() if universe is None else universe
+    extra = [tactical_holding] if tac_stock > 0 else []
+    extra.append(cash_holding)
+    types = pd.Categorical(
+        list(universe['type']) + [h['type'] for h in extra],
+        categories=list(dict.fromkeys(list(universe['type'].cat.categories) + [h['type'] for h in extra]))
+    )
+
+    df_pf = pd.DataFrame({
+        '종목': np.concatenate([universe['name'].to_numpy(), [h['name'] for h in extra]]),
+        '금액': np.concatenate([str_stock * universe['weight'].to_numpy(), [tac_stock] * (len(extra) - 1) + [tac_cash + str_cash]]),
+        '유형': types,
+        'Rationale': np.concatenate([universe['rationale'].to_numpy(), [h['rationale'] for h in extra]]),
+    })
+    df_pf.insert(2, '비중', (df_pf['금액'] / capital) * 100 if capital else 0.0)
+    return df_pf.sort_values('금액', ascending=False)
+
+
+# 결과는 (자본, 전술 구간, 전략 구간) 에만 의존하므로 캐시 키로 구간 인덱스를 사용할 수 있습니다.
+def run_model_levels(capital, tac_level, str_level, universe=None):
+    tac = tactical_allocation(tac_level, capital)
+    stra = strategic_allocation(str_level, capital)
+    df_pf = build_portfolio(capital, tac[0], tac[1], stra[0], stra[1], universe)
+    return tac, stra, df_pf
+
+
+def run_model(capital, lw_strength, sentiment_index, analyst_consensus, universe=None):
+    return run_model_levels(capital, int(tactical_level(lw_strength)),
+                            int(strategic_level(sentiment_index, analyst_consensus)), universe)
+
+
+# --- 배치 배분 (고객 수천 명을 한 번에) ---
+# 결과 컬럼: batch_summary_columns + 종목별 금액 컬럼
+batch_summary_columns = ['tac_stock', 'tac_cash', 'str_stock', 'str_cash', 'signal', 'stance']
+
+
+def allocate_batch(capital, lw_strength, sentiment_index, analyst_consensus, universe=None, holdings=True):
+    # holdings=False 이면 요약 컬럼만 계산 (종목별 금액 행렬 생략)
+    universe = load_universe() if universe is None and holdings else universe
+    capital = np.asarray(capital, dtype=float)
+    tac_idx = tactical_level(lw_strength)
+    str_idx = strategic_level(sentiment_index, analyst_consensus)
+
+    tac_alloc = capital * tactical_ratio
+    equity_ratio = tactical_equity_ratios[tac_idx]
+    tac_stock = tac_alloc * equity_ratio
+    tac_cash = tac_alloc * (1 - equity_ratio)
+
+    str_alloc = capital * strategic_ratio
+    str_cash = str_alloc * strategic_cash_ratios[str_idx]
+    str_stock = str_alloc - str_cash
+
+    out = {
+        'tac_stock': tac_stock,
+        'tac_cash': tac_cash,
+        'str_stock': str_stock,
+        'str_cash': str_cash,
+        'signal': np.array([lv[1] for lv in tactical_levels], dtype=object)[tac_idx],
+        'stance': np.array([lv[1] for lv in strategic_levels], dtype=object)[str_idx],
+    }
+    if not holdings:
+        return pd.DataFrame(out)
+    amounts = pd.DataFrame(np.outer(str_stock, universe['weight'].to_numpy()), columns=universe['name'].to_numpy())
+    amounts[tactical_holding['name']] = tac_stock
+    amounts[cash_holding['name']] = tac_cash + str_cash
+    return pd.concat([pd.DataFrame(out), amounts], axis=1)
+
+
+# --- 전체 입력 공간 스윕 (LW 0~100 x 심리 0~100 x 컨센서스 1~5) ---
+lw_grid = np.arange(0, 101)
+sentiment_grid = np.arange(0, 101)
+consensus_grid = np.arange(1, 6)
+
+
+def sweep_allocation(capitals):
+    # 비율/구간 배열 shape: (LW, 심리, 컨센서스), 금액 배열 shape: (자본, LW, 심리, 컨센서스)
+    capitals = np.atleast_1d(np.asarray(capitals, dtype=float))
+    lw = lw_grid[:, None, None]
+    sent = sentiment_grid[None, :, None]
+    ana = consensus_grid[None, None, :]
+
+    tac_idx = tactical_level(lw)
+    str_idx = strategic_level(sent, ana)
+    tac_equity = tactical_equity_ratios[tac_idx] * tactical_ratio
+    str_equity = (1 - strategic_cash_ratios[str_idx]) * strategic_ratio
+    equity_ratio = tac_equity + str_equity
+
+    cap = capitals[:, None, None, None]
+    return {
+        'capital': capitals,
+        'tac_level': np.broadcast_to(tac_idx, equity_ratio.shape),
+        'str_level': np.broadcast_to(str_idx, equity_ratio.shape),
+        'equity_ratio': equity_ratio,
+        'equity': cap * equity_ratio,
+        'cash': cap * (1 - equity_ratio),
+    }
@@ -1,7 +1,21 @@
+import html
+import os
+import sqlite3
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+from batch_allocate import read_table
+from charts import (add_position_marker, aggregate_portfolio, allocation_history_figure, group_detail_figure, large_universe_threshold, net_worth_figure,
+                    portfolio_bar_figure, projection_fan_figure, real_estate_figure, signal_history_figure, sweep_heatmap_figure, top_n)
+from engine import allocate_batch, format_currency, run_model_levels, strategic_level, strategic_ratio, sweep_allocation, tactical_level
+from montecarlo import portfolio_moments, process_pool, run_projection, steps_per_year
+from optimizer import default_returns_path, missing_returns, optimize_universe, optimizer_modes
+from profiling import export_run, mark, new_run, profiling_enabled, run_total_ms, stage
+from realestate import default_assumptions, end_year, milestones, real_estate_scenarios
+from rebalance import generate_orders, target_weights, unpriced_targets
+from runstore import allocation_history, compare_runs, list_runs, projection_summary, save_projection, save_run
+from signals import default_signals_dir, latest_signals, model_inputs, signal_history, signals_version
+from universe import load_universe, universe_version
 
 # --- 페이지 설정 ---
 st.set_page_config(
@@ -11,116 +25,54 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 단계별 소요 시간 측정 (PF_PROFILE=1 또는 ?debug=1 일 때만 기록, 사이드바 하단에 표시)
+profile_run = new_run(profiling_enabled(st.query_params))
+
 # --- 스타일 커스터마이징 (CSS: Dark Blue-Grey Theme + High Contrast Text) ---
-st.markdown("""
-    <style>
-        @import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css');
-        
-        /* 1. 기본 폰트 및 전체 배경 설정 */
-        html, body, [class*="css"] {
-            font-family: 'Pretendard', sans-serif !important;
-            color: #FFFFFF; /* 기본 텍스트를 완전한 흰색으로 변경 */
-        }
-        
-        /* 전체 배경: 세련된 다크 블루/그레이 (Obsidian/Slate) */
-        .stApp {
-            background-color: #0F172A; /* Tailwind Slate 900 */
-        }
-        
-        /* 2. 헤더 및 강조 텍스트 (주황/골드 포인트) */
-        h1, h2, h3 {
-            color: #F59E0B !important; /* Amber 500 */
-            font-weight: 700 !important;
-            letter-spacing: -0.02em;
-        }
-        h4, h5 {
-            color: #E2E8F0 !important; /* 밝은 회색 (Slate 200) */
-        }
-        
-        /* 3. 탭 스타일링 (크고 가시성 있게) */
-        button[data-baseweb="tab"] {
-            font-size: 1.2rem !important;
-            font-weight: 700 !important;
-            padding: 1rem 2rem !important;
-            background-color: #1E293B !important;
-            border: 1px solid #334155 !important;
-            color: #94A3B8 !important;
-            margin-right: 8px !important;
-            border-radius: 8px 8px 0 0 !important;
-        }
-        button[data-baseweb="tab"][aria-selected="true"] {
-            background-color: #F59E0B !important;
-            color: #0F172A !important;
-            border-bottom: none !important;
-        }
-        
-        /* 4. 사이드바 스타일 */
-        [data-testid="stSidebar"] {
-            background-color: #020617; /* Slate 950 */
-            border-right: 1px solid #1E293B;
-        }
-        
-        /* 5. 카드 컨테이너 */
-        .dark-card {
-            background-color: #1E293B; /* Slate 800 */
-            padding: 24px;
-            border-radius: 12px;
-            border: 1px solid #334155;
-            box-shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.5);
-            margin-bottom: 24px;
-        }
-        
-        /* 6. 부동산 카드 (강조) */
-        .re-card {
-            background: linear-gradient(135deg, #1E3A8A 0%, #3B82F6 100%);
-            padding: 24px;
-            border-radius: 12px;
-            margin-bottom: 24px;
-            border: 1px solid #60A5FA;
-        }
-        .re-card h3, .re-card p, .re-card li { color: #FFFFFF !important; }
-        
-        /* 7. 철학 카드 스타일 */
-        .philo-card {
-            background-color: #1E293B;
-            border-left: 4px solid #F59E0B;
-            padding: 20px;
-            border-radius: 8px;
-            margin-bottom: 16px;
-        }
-        .philo-title {
-            font-size: 1.1em;
-            font-weight: bold;
-            color: #F59E0B;
-            margin-bottom: 8px;
-        }
-        .philo-desc {
-            font-size: 0.95em;
-            color: #F8FAFC; /* 아주 밝은 흰색 계열 (Slate 50) */
-            line-height: 1.6;
-        }
-        .philo-desc b {
-            color: #FFFFFF !important;
-        }
-
-        /* 구분선 */
-        hr { border-color: #334155; }
-        
-        /* 메트릭 값 색상 */
-        [data-testid="stMetricValue"] {
-            color: #F59E0B !important;
-        }
-        [data-testid="stMetricLabel"] {
-            color: #CBD5E1 !important; /* 메트릭 라벨도 밝게 */
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-def format_currency(value):
-    return f"₩{int(value):,}"
+# static/ 은 .streamlit/config.toml 의 server.enableStaticServing 으로 app/static/ 경로에 제공되며,
+# 스타일시트는 <link> 한 줄로 불러옵니다. 재실행 때는 이 한 줄만 다시 전송되고 CSS 본문은 브라우저가 ETag/Last-Modified 로 캐시합니다.
+# URL 의 ?v= 는 파일 수정 시각이므로 CSS 를 고치면 새로 받습니다.
+# Pretendard 폰트 파일이 있으면 로컬 폰트 스타일시트를 불러오고 (CDN 미사용 - 폐쇄망 지원),
+# 없으면 기존 CDN 스타일시트로 대체합니다 (로컬 파일 404 요청 없이 어느 환경에서나 Pretendard 표시, CDN 도 막히면 sans-serif).
+static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+font_file = 'fonts/PretendardVariable.woff2'
+font_cdn_css = 'https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css'
+
+def static_link(name):
+    return f"<link rel='stylesheet' href='app/static/{name}?v={int(os.path.getmtime(os.path.join(static_dir, name)))}'>"
+
+with stage(profile_run, 'css'):
+    style_links = [static_link('app.css')]
+    if os.path.exists(os.path.join(static_dir, font_file)):
+        style_links.insert(0, static_link('fonts/pretendard.css'))
+    else:
+        style_links.insert(0, f"<link rel='stylesheet' href='{font_cdn_css}'>")
+    st.markdown(''.join(style_links), unsafe_allow_html=True)
+
+# --- 시장 데이터 신호 ---
+# data/signals 의 가격/심리/컨센서스 파일에서 산출한 최신 신호로 모델 변수 슬라이더의 기본값을 채웁니다.
+# signals.py 가 새로 추가된 행만 증분 계산하며, 원본 파일의 크기/수정 시각(signal_key)이 같으면 캐시를 그대로 씁니다.
+@st.cache_data(max_entries=4)
+def cached_signals(signal_key):
+    return signal_history()
+
+@st.cache_data(max_entries=4)
+def cached_signal_figure(signal_key):
+    # 신호 이력을 그대로 모델에 넣어 일자별 총 주식 비중을 계산 (자본 1 기준 비율)
+    inputs = model_inputs(cached_signals(signal_key))
+    out = allocate_batch(1.0, inputs['lw_strength'].to_numpy(), inputs['sentiment'].to_numpy(), inputs['consensus'].to_numpy(), holdings=False)
+    return signal_history_figure(inputs, (out['tac_stock'] + out['str_stock']).to_numpy())
+
+with stage(profile_run, 'signals'):
+    signal_key = signals_version()
+    signal_error = None
+    try:
+        latest = latest_signals(cached_signals(signal_key) if signal_key else None)
+    except (OSError, ValueError) as e:
+        signal_error, latest = e, latest_signals()
 
 # --- 사이드바 ---
-with st.sidebar:
+with st.sidebar, stage(profile_run, 'sidebar'):
     st.header("🎛️ 시뮬레이션 설정")
     
     st.markdown("### 1. 금융 자산 설정")
@@ -129,166 +81,371 @@ with st.sidebar:
     st.markdown("---")
     
     st.markdown("### 2. 모델 변수")
-    lw_strength = st.slider("LW 변동성 돌파 강도", 0, 100, 50, help="단기 추세의 강도를 설정합니다.")
-    sentiment_index = st.slider("대중 심리 (Fear/Greed)", 0, 100, 50, help="시장의 공포와 탐욕 수준을 설정합니다.")
-    analyst_consensus = st.slider("애널리스트 컨센서스", 1, 5, 3, help="전문가들의 매수/매도 의견을 설정합니다.")
+    if signal_error is not None:
+        st.warning(f"시장 데이터를 읽지 못해 기본값을 사용합니다: {signal_error}")
+    elif latest['as_of'] is not None:
+        st.caption(f"📡 {latest['as_of']:%Y-%m-%d} 시장 데이터 기준 값으로 채웠습니다.")
+    lw_strength = st.slider("LW 변동성 돌파 강도", 0, 100, int(round(latest['lw_strength'])), help="단기 추세의 강도를 설정합니다.")
+    sentiment_index = st.slider("대중 심리 (Fear/Greed)", 0, 100, int(round(latest['sentiment'])), help="시장의 공포와 탐욕 수준을 설정합니다.")
+    analyst_consensus = st.slider("애널리스트 컨센서스", 1, 5, int(round(latest['consensus'])), help="전문가들의 매수/매도 의견을 설정합니다.")
 
     st.markdown("---")
-    st.markdown("### 3. 부동산 설정 (별도 분석용)")
-    real_estate_value = st.number_input("부동산 현재 시세 (원)", min_value=0, value=550000000, step=10000000, format="%d")
+
+    st.markdown("### 3. 핵심 비중 산출")
+    opt_mode = st.selectbox("비중 산출 방식", ['fixed'] + list(optimizer_modes), format_func=lambda m: optimizer_modes.get(m, "고정 비중 (유니버스 파일)"))
+    if opt_mode != 'fixed':
+        returns_path = st.text_input("수익률 이력 파일", value=default_returns_path, help="일자 x 종목 형태의 기간 수익률 (.csv / .parquet)")
+        opt_lower, opt_upper = st.slider("종목별 비중 범위 (%)", 0, 100, (0, 30))
+        risk_aversion = st.slider("위험 회피 계수", 1.0, 10.0, 3.0) if opt_mode == 'mean_variance' else 3.0
+        group_caps = tuple((kind, st.slider(f"유형 한도: {kind} (%)", 0, 100, 100) / 100) for kind in load_universe()['type'].cat.categories)
 
 
 # --- 로직: 금융 포트폴리오 ---
-core_stocks = [
-    {'name': '테슬라 (TSLA)', 'weight': 0.30, 'type': 'Strategic (Core)', 'rationale': '[Body] 유일한 양산형 휴머노이드 & AI 자율주행 데이터 독점. 로봇 시대의 애플.'},
-    {'name': '엔비디아 (NVDA)', 'weight': 0.15, 'type': 'Strategic (Core)', 'rationale': '[Brain] Physical AI를 위한 시뮬레이션(Isaac)과 두뇌(GPU) 독점. 대체 불가능한 인프라.'},
-    {'name': '팔란티어 (PLTR)', 'weight': 0.15, 'type': 'Strategic (Core)', 'rationale': '[OS] 국방/산업 현장의 엣지 AI 운영체제. 하드웨어와 소프트웨어를 연결하는 신경망.'},
-    {'name': '버티브 (VRT)', 'weight': 0.10, 'type': 'Strategic (Core)', 'rationale': '[Power] AI 학습/운용을 위한 데이터센터 전력 및 액체 냉각 대장주.'},
-    {'name': '비트코인 (BTC)', 'weight': 0.10, 'type': 'Strategic (Core)', 'rationale': '[Hedge] 중앙화된 화폐 시스템 붕괴 및 유동성 확장에 대한 헷지(Digital Gold).'},
-    {'name': 'LS ELECTRIC', 'weight': 0.05, 'type': 'Strategic (Core)', 'rationale': '[Infra] 북미 AI 데이터센터향 초고압 변압기 수요 폭증 수혜. 한국 전력 기기 대장주.'},
-    {'name': '레인보우로보틱스', 'weight': 0.05, 'type': 'Strategic (Core)', 'rationale': '[Robot] 삼성전자가 선택한 휴머노이드 기술력. 이족보행 플랫폼 및 핵심 부품 내재화.'},
-    {'name': 'ASTS (Space)', 'weight': 0.05, 'type': 'Strategic (Core)', 'rationale': '[Net] 전 세계 어디서나 로봇이 연결되는 우주 통신망. 스페이스X의 통신 대안.'},
-]
-
-strategic_ratio = 0.8
-tactical_ratio = 0.2
-
-# 단기 전술 로직
-def run_tactical_sim(strength):
-    equity_ratio = 0.0
-    signal = ""
-    signal_color = "#94A3B8"
-
-    if strength >= 80:
-        equity_ratio = 1.0; signal = "🚀 강력 돌파 (Strong Breakout)"; signal_color = "#EF4444" 
-    elif strength >= 60:
-        equity_ratio = 0.6; signal = "📈 추세 추종 (Trend Following)"; signal_color = "#F97316"
-    elif strength <= 20:
-        equity_ratio = 0.0; signal = "🛡️ 추세 붕괴 (Stop Loss)"; signal_color = "#3B82F6" 
-    else:
-        equity_ratio = 0.2; signal = "👀 관망/탐색 (Watching)"; signal_color = "#94A3B8"
-    
-    alloc = financial_capital * tactical_ratio
-    return alloc * equity_ratio, alloc * (1 - equity_ratio), signal, signal_color
-
-# 중기 전략 로직
-def run_strategic_sim(sent, ana):
-    risk_score = (sent * 0.7) + ((ana - 1) * 25 * 0.3)
-    target_cash = 0.05
-    stance = ""
-    stance_color = "#94A3B8"
-
-    if risk_score >= 80:
-        target_cash = 0.30; stance = "🚨 과열 (Reduce)"; stance_color = "#EF4444"
-    elif risk_score >= 60:
-        target_cash = 0.15; stance = "⚠️ 경계 (Hold)"; stance_color = "#F97316"
-    elif risk_score <= 20:
-        target_cash = 0.0; stance = "💎 바닥 (Buy)"; stance_color = "#3B82F6"
-    else:
-        target_cash = 0.05; stance = "⚖️ 균형 (Neutral)"; stance_color = "#94A3B8"
-        
-    alloc = financial_capital * strategic_ratio
-    cash = alloc * target_cash
-    stock = alloc - cash
-    return stock, cash, stance, stance_color
+# 각 단계는 실제 입력값을 키로 캐시되며, max_entries 를 넘으면 오래된 항목부터 제거됩니다.
+# 포트폴리오는 (자본, 전술 구간, 전략 구간) 에만 의존하므로 같은 구간 안에서의 슬라이더 이동은 캐시 적중입니다.
+# 유니버스 파일의 수정 시각과 최적화 설정(pf_key)도 키에 포함하여 입력이 바뀌면 자동으로 다시 계산합니다.
+@st.cache_data(max_entries=32)
+def cached_universe(pf_key):
+    opt_key = pf_key[1]
+    if opt_key is None:
+        return None
+    path, mtime, mode, lower, upper, caps, risk_aversion = opt_key
+    return optimize_universe(load_universe(), path, mode, lower, upper, dict(caps), risk_aversion)
+
+@st.cache_data(max_entries=256)
+def cached_model(capital, tac_lv, str_lv, pf_key):
+    return run_model_levels(capital, tac_lv, str_lv, cached_universe(pf_key))
+
+@st.cache_data(max_entries=256)
+def cached_bar_figure(capital, tac_lv, str_lv, pf_key):
+    return portfolio_bar_figure(cached_model(capital, tac_lv, str_lv, pf_key)[2])
+
+@st.cache_data(max_entries=64)
+def cached_group_detail(capital, tac_lv, str_lv, pf_key, kind):
+    return group_detail_figure(cached_model(capital, tac_lv, str_lv, pf_key)[2], kind)
+
+# 몬테카를로 작업 프로세스 풀은 서버 프로세스당 하나만 만들어 모든 세션/실행이 공유합니다 (실행마다 새 풀을 만들지 않음).
+# spawn 작업 프로세스는 시작할 때 앱 스크립트를 한 번 import(bare 모드) 하므로, 풀을 재사용하면 이 비용도 작업 프로세스당 한 번뿐입니다.
+@st.cache_resource
+def projection_pool():
+    return process_pool()
 
-tac_stock, tac_cash, tac_sig, tac_col = run_tactical_sim(lw_strength)
-str_stock, str_cash, str_sta, str_col = run_strategic_sim(sentiment_index, analyst_consensus)
+# 전체 입력 공간 스윕은 자본금별로 한 번만 계산하고, 슬라이더 이동 시에는 캐시된 표면을 조회합니다.
+@st.cache_data(max_entries=32)
+def allocation_surface(capital):
+    return sweep_allocation(capital)
+
+@st.cache_data(max_entries=32)
+def cached_sweep_heatmap(capital, consensus):
+    return sweep_heatmap_figure(allocation_surface(capital), consensus)
+
+# 부동산 시나리오는 (시세, 시나리오 수, 가정, 금융 포트폴리오 요약) 별로 캐시
+@st.cache_data(max_entries=64)
+def cached_real_estate(real_estate_value, n_scenarios, assumptions, financial):
+    result = real_estate_scenarios(real_estate_value, n_scenarios, financial=financial, **dict(assumptions))
+    return real_estate_figure(result, milestones), net_worth_figure(result), result['prob_below_start']
+
+with stage(profile_run, 'model'):
+    tac_lv = int(tactical_level(lw_strength))
+    str_lv = int(strategic_level(sentiment_index, analyst_consensus))
+
+    # 최적화 실패(파일 없음, 제약 불가능 등) 시 고정 비중으로 대체
+    opt_key = None
+    if opt_mode != 'fixed':
+        try:
+            opt_key = (returns_path, os.path.getmtime(returns_path), opt_mode, opt_lower / 100, opt_upper / 100, group_caps, risk_aversion)
+            cached_universe((universe_version(), opt_key))
+            unoptimized = missing_returns(load_universe(), returns_path)
+            if unoptimized:
+                st.sidebar.warning(f"수익률 이력이 없는 {len(unoptimized):,}개 종목은 원래 비중을 유지합니다: {', '.join(unoptimized[:5])}"
+                                   + (" 외" if len(unoptimized) > 5 else ""))
+        except (OSError, ValueError) as e:
+            st.sidebar.warning(f"최적화를 적용하지 못해 고정 비중을 사용합니다: {e}")
+            opt_key = None
+    pf_key = (universe_version(), opt_key)
+    (tac_stock, tac_cash, tac_sig, tac_col), (str_stock, str_cash, str_sta, str_col), df_pf = cached_model(financial_capital, tac_lv, str_lv, pf_key)
 
 # --- 메인 화면 ---
 st.title("Investment Master Model")
 st.markdown("**Financial Portfolio Strategy & Real Estate Analysis**")
 
-# 금융 포트폴리오 데이터 생성
-final_pf = []
-for s in core_stocks:
-    amt = (str_stock * s['weight']) / 0.95
-    final_pf.append({'종목': s['name'], '금액': amt, '비중': 0, '유형': s['type'], 'Rationale': s['rationale']})
+# 몬테카를로 프로젝션은 독립 갱신 영역(fragment)으로 분리하여, 기간/경로 수 변경 시 페이지 전체를 다시 그리지 않습니다.
+@st.fragment
+def projection_section(df_pf, model_key, run_id):
+    st.markdown("### 🔮 미래 가치 프로젝션 (Monte Carlo)")
+    mc1, mc2, mc3 = st.columns(3)
+    mc_years = mc1.slider("투자 기간 (년)", 1, 30, 10)
+    mc_paths = mc2.select_slider("시뮬레이션 경로 수", options=[10000, 100000, 1000000, 5000000], value=100000, format_func=lambda n: f"{n:,}")
+    mc_run = mc3.button("프로젝션 실행", use_container_width=True)
 
-if tac_stock > 0: 
-    final_pf.append({'종목': '단기 트레이딩 (TQQQ 등)', '금액': tac_stock, '비중': 0, '유형': 'Tactical', 'Rationale': '[Momentum] 단기 변동성 돌파 전략 실행을 위한 레버리지 ETF 운용.'})
-    
-total_cash = tac_cash + str_cash
-final_pf.append({'종목': '현금 (Cash Buffer)', '금액': total_cash, '비중': 0, '유형': 'Buffer', 'Rationale': '[Option] 폭락장 대응 및 새로운 기회를 위한 현금성 자산.'})
+    # 무거운 연산이므로 버튼을 눌렀을 때만 실행하고, 입력이 같으면 이전 결과를 재사용합니다.
+    mc_key = model_key + (mc_years, mc_paths)
+    if mc_run:
+        mc_bar = st.progress(0.0, text="시뮬레이션 준비 중...")
+        mc_result = run_projection(df_pf, mc_years, mc_paths, pool=projection_pool(),
+                                   progress=lambda done, total: mc_bar.progress(done / total, text=f"{done:,} / {total:,} 경로 완료"))
+        mc_bar.empty()
+        st.session_state['mc_result'] = (mc_key, mc_result)
+        if run_id is not None:
+            try:
+                save_projection(run_id, 'montecarlo', {'years': mc_years, 'paths': mc_paths}, projection_summary(mc_result))
+            except (OSError, sqlite3.Error) as e:
+                st.warning(f"프로젝션 결과를 저장하지 못했습니다: {e}")
+
+    if st.session_state.get('mc_result', (None, None))[0] == mc_key:
+        mc_result = st.session_state['mc_result'][1]
+        fig_mc = projection_fan_figure(mc_result['fan'], model_key[0], steps_per_year)
+        st.plotly_chart(fig_mc, use_container_width=True)
+
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("중앙값 (만기)", format_currency(model_key[0] * mc_result['fan'][50][-1]))
+        m2.metric("손실 확률", f"{mc_result['prob_loss'] * 100:.1f}%")
+        # VaR/CVaR 는 손실 비율(양수 = 손실) - 하위 5% 구간이 이익일 수도 있으므로 부호는 값에서 표시
+        m3.metric("VaR 95%", f"{-mc_result['var'][0.95] * 100:+.1f}%")
+        m4.metric("CVaR 95%", f"{-mc_result['cvar'][0.95] * 100:+.1f}%")
+        m5.metric("최대낙폭 (중앙값)", f"-{mc_result['mdd_median'] * 100:.1f}%")
+        st.caption(f"* {mc_result['paths']:,}개 경로 기준. 종목별 기대수익률/변동성은 montecarlo.py 의 가정치를 사용한 추정이며, 실제 성과를 보장하지 않습니다.")
+
+
+# 부동산 차트는 금융 입력과 무관하므로 독립 갱신 영역(fragment)으로 분리합니다.
+# 통합 순자산 계산용 금융 포트폴리오 요약(financial)은 마지막 전체 실행 시점의 값을 사용합니다.
+@st.fragment
+def real_estate_section(financial):
+    st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
+    real_estate_value = st.number_input("부동산 현재 시세 (원)", min_value=0, value=550000000, step=10000000, format="%d")
+    with st.expander("⚙️ 시나리오 가정"):
+        a1, a2, a3 = st.columns(3)
+        growth = a1.slider("연 기대 상승률 (%)", -5.0, 15.0, default_assumptions['growth'] * 100, 0.5)
+        volatility = a2.slider("연 변동성 (%)", 0.0, 30.0, default_assumptions['volatility'] * 100, 0.5)
+        rental_yield = a3.slider("임대 수익률 (%)", 0.0, 8.0, default_assumptions['rental_yield'] * 100, 0.1)
+        b1, b2, b3 = st.columns(3)
+        shock_prob = b1.slider("연간 금리 충격 확률 (%)", 0, 50, int(default_assumptions['shock_prob'] * 100))
+        delay_prob = b2.slider("개발 단계별 지연 확률 (%)", 0, 90, int(default_assumptions['delay_prob'] * 100))
+        n_scenarios = b3.select_slider("시나리오 수", options=[5000, 20000, 50000, 100000], value=20000, format_func=lambda n: f"{n:,}")
+    assumptions = (
+        ('growth', growth / 100), ('volatility', volatility / 100), ('rental_yield', rental_yield / 100),
+        ('shock_prob', shock_prob / 100), ('delay_prob', delay_prob / 100),
+    )
+
+    fig_re, fig_nw, prob_below = cached_real_estate(real_estate_value, n_scenarios, assumptions, financial)
+    st.plotly_chart(fig_re, use_container_width=True)
+    st.caption(f"* {n_scenarios:,}개 시나리오 기준. 금리 충격, 착공/완공 지연, 임대 수익을 반영한 추정치이며, 실제 시장 상황에 따라 달라질 수 있습니다. "
+               f"({end_year}년 시세가 현재보다 낮을 확률: {prob_below * 100:.1f}%)")
+    st.markdown("#### 💼 금융 + 부동산 통합 순자산")
+    st.plotly_chart(fig_nw, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-df_pf = pd.DataFrame(final_pf)
-df_pf['비중'] = (df_pf['금액'] / financial_capital) * 100
-df_pf = df_pf.sort_values('금액', ascending=False)
+
+# 리밸런싱 주문: 보유 파일을 올리면 현재 목표 비중(df_pf) 기준 최소 주문 목록을 만듭니다.
+@st.fragment
+def rebalance_section(df_pf):
+    st.markdown("### 🔁 리밸런싱 주문 생성")
+    u1, u2 = st.columns(2)
+    positions_file = u1.file_uploader("현재 보유 (account, name, quantity [, price, lot_size])", type=['csv', 'parquet'])
+    prices_file = u2.file_uploader("가격 (name, price [, lot_size]) - 선택", type=['csv', 'parquet'])
+    r1, r2 = st.columns(2)
+    tolerance = r1.slider("허용 밴드 (계좌 평가액 대비 %)", 0.0, 5.0, 1.0, 0.1)
+    min_trade = r2.number_input("최소 주문 금액 (원)", min_value=0, value=100000, step=10000, format="%d")
+    if positions_file is None:
+        st.caption("* 현금은 name 을 '현금 (Cash Buffer)' 로, quantity 를 금액으로 입력합니다. 매수는 목표 현금 비중을 남기는 범위에서만 실행됩니다.")
+        return
+
+    try:
+        positions, targets = read_table(positions_file), target_weights(df_pf)
+        prices = read_table(prices_file) if prices_file is not None else None
+        unpriced = unpriced_targets(positions, targets, prices)
+        orders, summary = generate_orders(positions, targets, prices, tolerance / 100, min_trade)
+    except (KeyError, ValueError) as e:
+        st.error(f"주문을 만들 수 없습니다: {e}")
+        return
+    if unpriced:
+        st.warning(f"가격 정보가 없어 매수하지 않은 목표 종목 {len(unpriced):,}개 (가격 파일 필요): {', '.join(map(str, unpriced[:5]))}"
+                   + (" 외" if len(unpriced) > 5 else ""))
+    s1, s2, s3 = st.columns(3)
+    s1.metric("주문 수", f"{len(orders):,}건")
+    s2.metric("총 매수", format_currency(summary['buy_value'].sum()))
+    s3.metric("총 매도", format_currency(summary['sell_value'].sum()))
+    st.dataframe(orders, use_container_width=True, hide_index=True)
+    if len(summary) > 1:
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.download_button("주문 CSV 다운로드", orders.to_csv(index=False).encode('utf-8-sig'), "orders.csv", "text/csv")
+
+
+# 종목별 투자 이유 카드: 검색/유형 필터 후 현재 페이지의 행만 하나의 HTML 블록으로 전송합니다.
+rationale_page_sizes = [10, 25, 50, 100]
+
+def rationale_card(name, kind, weight, rationale):
+    return (
+        "<div style='background-color: #1E293B; border-left: 3px solid #F59E0B; padding: 15px; margin-bottom: 10px; border-radius: 4px;'>"
+        "<div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;'>"
+        f"<span style='font-weight: bold; font-size: 1.1em; color: #F59E0B;'>{html.escape(str(name))}</span>"
+        f"<span style='color: #94A3B8; font-size: 0.9em;'>{html.escape(str(kind))} | {weight:.1f}%</span>"
+        "</div>"
+        f"<div style='color: #FFFFFF; font-size: 0.95em;'>{html.escape(str(rationale))}</div>"
+        "</div>"
+    )
+
+@st.fragment
+def rationale_section(df_pf):
+    f1, f2 = st.columns([2, 1])
+    query = f1.text_input("종목/투자 이유 검색", placeholder="예: AI, 전력, 로봇")
+    kinds = f2.multiselect("유형", list(dict.fromkeys(df_pf['유형'])))
+
+    view = df_pf
+    if kinds:
+        view = view[view['유형'].isin(kinds)]
+    if query:
+        view = view[view['종목'].str.contains(query, case=False, regex=False) | view['Rationale'].str.contains(query, case=False, regex=False)]
+
+    total = len(view)
+    page_size = rationale_page_sizes[0]
+    page = 1
+    if total > rationale_page_sizes[0]:
+        p1, p2, p3 = st.columns([1, 1, 2])
+        page_size = p1.selectbox("페이지당 종목 수", rationale_page_sizes)
+        pages = max(1, -(-total // page_size))
+        page = p2.number_input("페이지", min_value=1, max_value=pages, value=1, key=f"rationale_page_{total}_{page_size}")
+        p3.caption(f"총 {total:,}개 중 {(page - 1) * page_size + 1:,}~{min(page * page_size, total):,}번째 표시")
+
+    rows = view.iloc[(page - 1) * page_size:page * page_size]
+    if rows.empty:
+        st.caption("조건에 맞는 종목이 없습니다.")
+        return
+    st.markdown("".join(rationale_card(*r) for r in zip(rows['종목'], rows['유형'], rows['비중'], rows['Rationale'])), unsafe_allow_html=True)
+
+
+# 실행 기록: 최근 실행 목록, 두 실행의 종목별 차이, 저장된 실행들의 배분 추이
+# 모든 조회는 runstore 의 SQL 집계 결과(표시할 행)만 읽습니다.
+history_limit = 500
+
+def run_label(row):
+    return f"{row.created} | LW {row.lw_strength:.0f} / 심리 {row.sentiment:.0f} / 컨센서스 {row.consensus:.0f} | {format_currency(row.capital)}"
+
+@st.fragment
+def history_section(current_run_id):
+    try:
+        runs = list_runs(limit=history_limit)
+    except (OSError, sqlite3.Error) as e:
+        st.warning(f"실행 기록을 읽지 못했습니다: {e}")
+        return
+    if runs.empty:
+        st.caption("저장된 실행이 없습니다.")
+        return
+    st.caption(f"최근 {len(runs):,}개 실행 (입력이 같은 실행은 한 번만 저장)")
+    labels = {row.run_id: run_label(row) for row in runs.itertuples()}
+    ids = list(labels)
+
+    h1, h2 = st.columns(2)
+    run_b = h2.selectbox("비교 실행 (B)", ids, index=ids.index(current_run_id) if current_run_id in labels else 0, format_func=labels.get)
+    run_a = h1.selectbox("기준 실행 (A)", ids, index=min(1, len(ids) - 1), format_func=labels.get)
+    a, b = runs.set_index('run_id').loc[run_a], runs.set_index('run_id').loc[run_b]
+    d1, d2, d3, d4 = st.columns(4)
+    d1.metric("전술 주식", format_currency(b['tac_stock']), format_currency(b['tac_stock'] - a['tac_stock']))
+    d2.metric("전술 현금", format_currency(b['tac_cash']), format_currency(b['tac_cash'] - a['tac_cash']))
+    d3.metric("전략 주식", format_currency(b['str_stock']), format_currency(b['str_stock'] - a['str_stock']))
+    d4.metric("전략 현금", format_currency(b['str_cash']), format_currency(b['str_cash'] - a['str_cash']))
+    st.caption(f"A: {a['signal']} / {a['stance']}  →  B: {b['signal']} / {b['stance']}")
+    changed = compare_runs(run_a, run_b)
+    if changed.empty:
+        st.caption("두 실행의 종목별 배분이 같습니다.")
+    else:
+        st.dataframe(changed.head(200), use_container_width=True, hide_index=True)
+
+    st.markdown("#### 📈 배분 추이")
+    t1, t2 = st.columns([1, 1])
+    by = t1.radio("기준", ['type', 'name'], horizontal=True, format_func={'type': "유형별 합계", 'name': "최근 상위 종목"}.get)
+    max_runs = t2.select_slider("최근 실행 수", options=[50, 100, 200, 500, 1000], value=200)
+    history = allocation_history(by, top=10, max_runs=max_runs)
+    if not history.empty:
+        st.plotly_chart(allocation_history_figure(history), use_container_width=True)
 
 
 # 탭 구성 (크게 키움)
-tab1, tab2, tab3 = st.tabs(["💰 금융 포트폴리오", "🧠 투자 철학 (Engine)", "🏢 부동산 (별도 분석)"])
+tab1, tab2, tab3, tab4 = st.tabs(["💰 금융 포트폴리오", "🧠 투자 철학 (Engine)", "🏢 부동산 (별도 분석)", "🗂️ 실행 기록"])
 
 with tab1:
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
-        st.subheader("⚡ Track A: 단기 전술 (20%)")
-        st.markdown(f"<h3 style='color: {tac_col} !important;'>{tac_sig}</h3>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2)
-        c1.metric("공격 자산", format_currency(tac_stock))
-        c2.metric("현금 대기", format_currency(tac_cash))
-        st.markdown("</div>", unsafe_allow_html=True)
+    with stage(profile_run, 'cards'):
+        col1, col2 = st.columns(2)
         
-    with col2:
-        st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
-        st.subheader("🎯 Track B: 중기 전략 (80%)")
-        st.markdown(f"<h3 style='color: {str_col} !important;'>{str_sta}</h3>", unsafe_allow_html=True)
-        c1, c2 = st.columns(2)
-        c1.metric("핵심 자산", format_currency(str_stock))
-        c2.metric("현금 비중", f"{int((str_cash / (financial_capital * strategic_ratio)) * 100)}%")
-        st.markdown("</div>", unsafe_allow_html=True)
+        with col1:
+            st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
+            st.subheader("⚡ Track A: 단기 전술 (20%)")
+            st.markdown(f"<h3 style='color: {tac_col} !important;'>{tac_sig}</h3>", unsafe_allow_html=True)
+            c1, c2 = st.columns(2)
+            c1.metric("공격 자산", format_currency(tac_stock))
+            c2.metric("현금 대기", format_currency(tac_cash))
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
+            st.subheader("🎯 Track B: 중기 전략 (80%)")
+            st.markdown(f"<h3 style='color: {str_col} !important;'>{str_sta}</h3>", unsafe_allow_html=True)
+            c1, c2 = st.columns(2)
+            c1.metric("핵심 자산", format_currency(str_stock))
+            c2.metric("현금 비중", f"{int((str_cash / (financial_capital * strategic_ratio)) * 100)}%")
+            st.markdown("</div>", unsafe_allow_html=True)
+    # 제목과 두 트랙 카드까지 = 첫 화면 (벤치마크의 time-to-first-render 기준)
+    mark(profile_run, 'first_render')
 
+    # 실행 기록 저장 (첫 화면 이후): 입력 내용 해시가 같으면 쓰지 않으며, 저장 실패 시에도 화면은 그대로 표시
+    with stage(profile_run, 'run_store'):
+        run_inputs = {'capital': financial_capital, 'lw_strength': lw_strength, 'sentiment': sentiment_index, 'consensus': analyst_consensus,
+                      'tac_level': tac_lv, 'str_level': str_lv, 'opt_mode': opt_mode, 'pf_key': pf_key}
+        try:
+            run_id = save_run(run_inputs, (tac_stock, tac_cash, tac_sig), (str_stock, str_cash, str_sta), df_pf)[0]
+        except (OSError, sqlite3.Error) as e:
+            st.sidebar.warning(f"실행 기록을 저장하지 못했습니다: {e}")
+            run_id = None
+        
     st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
     st.markdown("### 📊 통합 포트폴리오 시뮬레이션")
     
     # Plotly Bar Chart (비중 % 표시 복구)
-    fig_bar = px.bar(
-        df_pf, 
-        x='비중', 
-        y='종목', 
-        orientation='h', 
-        text='비중', # 비중을 텍스트로 표시
-        color='유형',
-        color_discrete_map={
-            'Strategic (Core)': '#F59E0B', # Amber
-            'Tactical': '#EF4444',        # Red
-            'Buffer': '#3B82F6'           # Blue
-        },
-        template='plotly_dark'
-    )
-    # 텍스트 포맷팅 (XX.X%)
-    fig_bar.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-    fig_bar.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)', 
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#FFFFFF'), # 차트 폰트 흰색으로 변경
-        yaxis={'categoryorder':'total ascending', 'title': None},
-        xaxis={'title': '비중 (%)'},
-        margin=dict(l=0, r=0, t=30, b=0),
-        height=500
-    )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    with stage(profile_run, 'bar_chart'):
+        fig_bar = cached_bar_figure(financial_capital, tac_lv, str_lv, pf_key)
+        if len(df_pf) > large_universe_threshold:
+            # 대규모 유니버스: '기타' 묶음 막대를 클릭하면 해당 유형의 상세 분포를 펼칩니다.
+            bar_event = st.plotly_chart(fig_bar, use_container_width=True, on_select='rerun', selection_mode='points', key='pf_bar')
+            picked = {p.get('y') for p in bar_event.selection.points}
+            if picked:
+                agg = aggregate_portfolio(df_pf)
+                for kind in agg.loc[agg['종목'].isin(picked) & agg['group'].notna(), 'group']:
+                    st.plotly_chart(cached_group_detail(financial_capital, tac_lv, str_lv, pf_key, kind), use_container_width=True)
+            st.caption(f"* 종목 수가 많아 상위 {top_n}개와 유형별 '기타' 묶음으로 표시합니다. '기타' 막대를 클릭하면 상세 분포를 볼 수 있습니다.")
+        else:
+            st.plotly_chart(fig_bar, use_container_width=True)
+    
+    st.markdown("---")
+    st.markdown(f"### 🗺️ 배분 지도 (컨센서스 {analyst_consensus} 기준 주식/현금 분할)")
+    with stage(profile_run, 'sweep_heatmap'):
+        fig_sweep = add_position_marker(cached_sweep_heatmap(financial_capital, analyst_consensus), sentiment_index, lw_strength)
+        st.plotly_chart(fig_sweep, use_container_width=True)
+    
+    if latest['as_of'] is not None:
+        st.markdown("---")
+        st.markdown("### 📡 시장 데이터 신호 이력")
+        with stage(profile_run, 'signal_history'):
+            st.plotly_chart(cached_signal_figure(signal_key), use_container_width=True)
+            st.caption(f"* {default_signals_dir} 의 일별 데이터로 산출한 신호와, 그 신호대로 배분했을 때의 총 주식 비중(Track A + B)입니다.")
+    
+    st.markdown("---")
+    with stage(profile_run, 'projection'):
+        projection_section(df_pf, (financial_capital, tac_lv, str_lv, pf_key), run_id)
+    
+    st.markdown("---")
+    with stage(profile_run, 'rebalance'):
+        rebalance_section(df_pf)
     
     st.markdown("---")
     st.markdown("### 📌 종목별 사업적 본질 및 투자 이유 (Rationale)")
     
     # Rationale Display
-    for index, row in df_pf.iterrows():
-        st.markdown(f"""
-        <div style='background-color: #1E293B; border-left: 3px solid #F59E0B; padding: 15px; margin-bottom: 10px; border-radius: 4px;'>
-            <div style='display: flex; justify-content: space-between; align-items: center; margin-bottom: 5px;'>
-                <span style='font-weight: bold; font-size: 1.1em; color: #F59E0B;'>{row['종목']}</span>
-                <span style='color: #94A3B8; font-size: 0.9em;'>{row['유형']} | {row['비중']:.1f}%</span>
-            </div>
-            <div style='color: #FFFFFF; font-size: 0.95em;'>{row['Rationale']}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    with stage(profile_run, 'rationale'):
+        rationale_section(df_pf)
     
     st.markdown("</div>", unsafe_allow_html=True)
 
-with tab2:
+with tab2, stage(profile_run, 'philosophy'):
     st.markdown("### 🧠 Investment Engine Philosophy")
     st.caption("이 모델을 구동하는 4가지 핵심 투자 철학과 적용 방식입니다.")
     
@@ -348,7 +505,7 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
 
-with tab3:
+with tab3, stage(profile_run, 'real_estate'):
     # 부동산 별도 분석 탭
     st.markdown("""
     <div class='re-card'>
@@ -397,28 +554,16 @@ with tab3:
         st.markdown("</div>", unsafe_allow_html=True)
         
     # 가치 상승 차트
-    st.markdown("<div class='dark-card'>", unsafe_allow_html=True)
-    years = ['현재(2025)', '착공(2027)', '완공(2030)', '성숙기(2035)']
-    values = [real_estate_value/100000000, real_estate_value*1.25/100000000, real_estate_value*1.6/100000000, real_estate_value*2.2/100000000]
-    
-    fig_re = go.Figure()
-    fig_re.add_trace(go.Scatter(
-        x=years, y=values, 
-        mode='lines+markers+text', 
-        text=[f"{v:.1f}억" for v in values], 
-        textposition="top center",
-        line=dict(color='#F59E0B', width=4), 
-        marker=dict(size=12, color='#F59E0B')
-    ))
-    fig_re.update_layout(
-        title="예상 가치 상승 시뮬레이션 (단위: 억)", 
-        template="plotly_dark", 
-        paper_bgcolor='rgba(0,0,0,0)', 
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color='#FFFFFF'), # 차트 폰트 흰색으로 변경
-        showlegend=False,
-        height=400
-    )
-    st.plotly_chart(fig_re, use_container_width=True)
-    st.caption("* 위 시뮬레이션은 개발 호재 반영 및 인플레이션을 감안한 추정치이며, 실제 시장 상황에 따라 달라질 수 있습니다.")
-    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+    real_estate_section((financial_capital,) + portfolio_moments(df_pf))
+
+with tab4, stage(profile_run, 'history'):
+    history_section(run_id)
+
+# --- 디버그 패널: 이번 전체 실행의 단계별 소요 시간 ---
+# fragment 단독 재실행은 전체 실행이 아니므로 집계되지 않습니다.
+if profile_run['enabled']:
+    profile_run['context'].update(holdings=len(df_pf), opt_mode=opt_mode)
+    export_run(profile_run)
+    with st.sidebar.expander("⏱️ 단계별 소요 시간 (Debug)", expanded=True):
+        st.dataframe(profile_run['stages'], use_container_width=True, hide_index=True)
+        st.caption(f"합계 {run_total_ms(profile_run):,.1f} ms / 첫 화면 {profile_run['marks'].get('first_render', 0):,.1f} ms / 종목 {len(df_pf):,}개")
\ No newline at end of file
@@ -0,0 +1,125 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# --- 배분 서비스 부하 테스트 ---
+# 사용법: python loadtest.py --spawn [--connections 200 --requests 50000]
+#         python loadtest.py --url http://127.0.0.1:8600 ...   (이미 실행 중인 서비스)
+# 연결마다 keep-alive 로 요청을 연속 전송하고 초당 요청 수(RPS)와 지연 시간 백분위(p50/p95/p99)를 보고합니다.
+# 서비스의 /stats 로 평균 배치 크기도 함께 출력합니다.
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, path, payloads, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for payload in payloads:
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, host, 'POST', path, payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def make_payloads(n, seed, holdings, years, paths):
+    rng = np.random.default_rng(seed)
+    payloads = [{
+        'capital': float(c), 'lw_strength': int(lw), 'sentiment': int(s), 'consensus': int(a), 'holdings': holdings,
+    } for c, lw, s, a in zip(rng.integers(10, 1000, n) * 1_000_000, rng.integers(0, 101, n), rng.integers(0, 101, n), rng.integers(1, 6, n))]
+    if years:
+        for p in payloads:
+            p.update(years=years, paths=paths)
+    return payloads
+
+
+async def run_load(host, port, path, connections, total, holdings, years, paths, seed):
+    payloads = make_payloads(total, seed, holdings, years, paths)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, path, payloads[i::connections], latencies, errors) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    stats = (await request(reader, writer, host, 'GET', '/stats'))[1]
+    writer.close()
+    return elapsed, np.array(latencies) * 1000, errors, stats
+
+
+async def wait_ready(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"{host}:{port} 서비스가 {timeout}초 안에 시작되지 않았습니다.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="배분 서비스 부하 테스트")
+    parser.add_argument('--url', default='http://127.0.0.1:8600', help="서비스 주소")
+    parser.add_argument('--spawn', action='store_true', help="service.py 를 하위 프로세스로 띄워서 테스트")
+    parser.add_argument('--service-args', default='', help="--spawn 시 service.py 에 넘길 추가 인자")
+    parser.add_argument('--endpoint', choices=['allocate', 'project'], default='allocate')
+    parser.add_argument('--connections', type=int, default=200, help="동시 연결 수")
+    parser.add_argument('--requests', type=int, default=50000, help="전체 요청 수")
+    parser.add_argument('--holdings', action='store_true', help="종목별 금액까지 요청")
+    parser.add_argument('--years', type=int, default=10, help="/project 기간")
+    parser.add_argument('--paths', type=int, default=20000, help="/project 경로 수")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    host, _, port = args.url.split('://', 1)[-1].rstrip('/').partition(':')
+    port = int(port or 80)
+    proc = None
+    if args.spawn:
+        proc = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service.py'),
+                                 '--host', host, '--port', str(port)] + args.service_args.split())
+    try:
+        asyncio.run(wait_ready(host, port))
+        years = args.years if args.endpoint == 'project' else None
+        elapsed, ms, errors, stats = asyncio.run(run_load(host, port, f"/{args.endpoint}", args.connections, args.requests,
+                                                          args.holdings, years, args.paths, args.seed))
+    except (OSError, TimeoutError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(f"/{args.endpoint}: {len(ms):,}건 / {elapsed:.2f}초, 동시 연결 {args.connections:,}")
+    print(f"  RPS {len(ms) / elapsed:,.0f}   지연 p50 {p50:.1f}ms  p95 {p95:.1f}ms  p99 {p99:.1f}ms  최대 {ms.max():.1f}ms")
+    print(f"  오류 {len(errors):,}건   서비스 통계 {stats}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from itertools import islice
+
+import numpy as np
+
+# --- 몬테카를로 프로젝션 엔진 ---
+# df_pf 의 보유 종목별 상관된 수익률 경로를 시뮬레이션합니다.
+# 경로는 고정 크기 청크 단위로 생성/집계되므로 수백만 경로에서도 메모리가 일정하게 유지되며,
+# 청크별 결과는 히스토그램으로 누적되어 프로세스 간 병합이 가능합니다.
+
+# 연 기대수익률, 연 변동성, 시장 팩터 적재량(상관관계 결정)
+asset_assumptions = {
+    '테슬라 (TSLA)': (0.15, 0.60, 0.60),
+    '엔비디아 (NVDA)': (0.18, 0.50, 0.70),
+    '팔란티어 (PLTR)': (0.15, 0.60, 0.60),
+    '버티브 (VRT)': (0.14, 0.50, 0.60),
+    '비트코인 (BTC)': (0.12, 0.65, 0.35),
+    'LS ELECTRIC': (0.10, 0.40, 0.40),
+    '레인보우로보틱스': (0.10, 0.55, 0.35),
+    'ASTS (Space)': (0.12, 0.85, 0.40),
+    '단기 트레이딩 (TQQQ 등)': (0.20, 0.65, 0.90),
+    '현금 (Cash Buffer)': (0.03, 0.0, 0.0),
+}
+# 종목별 가정이 없을 때 유형 기본값 사용
+type_assumptions = {
+    'Strategic (Core)': (0.10, 0.40, 0.60),
+    'Tactical': (0.20, 0.65, 0.90),
+    'Buffer': (0.03, 0.0, 0.0),
+}
+
+steps_per_year = 12
+percentiles = [5, 25, 50, 75, 95]
+name_block = 256
+
+# 누적 가치(초기 대비 배수)는 로그 구간, 최대낙폭은 선형 구간 히스토그램으로 집계
+value_bins = np.logspace(np.log10(0.01), np.log10(100), 2001)
+drawdown_bins = np.linspace(0, 1, 1001)
+
+
+def holding_assumptions(df_pf):
+    rows = [asset_assumptions.get(name, type_assumptions.get(kind, type_assumptions['Strategic (Core)']))
+            for name, kind in zip(df_pf['종목'], df_pf['유형'])]
+    mu, vol, loading = (np.array(col, dtype=float) for col in zip(*rows))
+    return mu, vol, loading
+
+
+def factor_correlation(loading):
+    corr = np.outer(loading, loading)
+    np.fill_diagonal(corr, 1.0)
+    return corr
+
+
+def portfolio_moments(df_pf):
+    # 포트폴리오 전체의 연 기대수익률과 변동성 (부동산 순자산 시나리오 등 단일 자산 근사용)
+    weights = (df_pf['금액'] / df_pf['금액'].sum()).to_numpy(dtype=float)
+    mu, vol, loading = holding_assumptions(df_pf)
+    # 단일 팩터 구조이므로 w'Σw = (Σ w·σ·β)^2 + Σ (w·σ)^2 (1 - β^2) 로 n x n 행렬 없이 계산
+    scaled = weights * vol
+    variance = (scaled @ loading) ** 2 + scaled @ (scaled * (1 - loading ** 2))
+    return float(weights @ mu), float(np.sqrt(variance))
+
+
+def simulate_chunk(weights, mu, vol, loading, chol, n_steps, n_paths, seed):
+    # chol 이 None 이면 단일 팩터 구조에서 바로 추출: z = β·f + sqrt(1-β²)·ε
+    # (n x n 상관행렬 곱 없이 종목 수에 선형, 종목은 name_block 개씩 나눠 계산하여 경로 x 종목 배열 크기를 제한)
+    rng = np.random.default_rng(seed)
+    dt = 1 / steps_per_year
+    drift = (mu - 0.5 * vol ** 2) * dt
+    shock = vol * np.sqrt(dt)
+
+    values = np.zeros((n_paths, n_steps + 1))
+    values[:, 0] = 1.0
+    if chol is None:
+        factor = rng.standard_normal((n_steps, n_paths))
+        idio = np.sqrt(np.clip(1 - loading ** 2, 0, None))
+        for lo in range(0, len(weights), name_block):
+            block = slice(lo, lo + name_block)
+            holdings = np.tile(weights[block], (n_paths, 1))
+            for t in range(1, n_steps + 1):
+                z = factor[t - 1][:, None] * loading[block] + rng.standard_normal(holdings.shape) * idio[block]
+                holdings *= np.exp(drift[block] + shock[block] * z)
+                values[:, t] += holdings.sum(axis=1)
+    else:
+        holdings = np.tile(weights, (n_paths, 1))
+        for t in range(1, n_steps + 1):
+            z = rng.standard_normal((n_paths, len(weights))) @ chol.T
+            holdings *= np.exp(drift + shock * z)
+            values[:, t] = holdings.sum(axis=1)
+
+    n_bins = len(value_bins) - 1
+    idx = np.clip(np.searchsorted(value_bins, values, side='right') - 1, 0, n_bins - 1)
+    idx += np.arange(n_steps + 1) * n_bins
+    value_hist = np.bincount(idx.ravel(), minlength=(n_steps + 1) * n_bins).reshape(n_steps + 1, n_bins)
+
+    drawdown = 1 - (values / np.maximum.accumulate(values, axis=1)).min(axis=1)
+    dd_hist = np.histogram(drawdown, bins=drawdown_bins)[0]
+    return value_hist, dd_hist, values[:, -1].sum(), n_paths
+
+
+def hist_quantile(hist, bins, q):
+    cdf = np.cumsum(hist, axis=-1) / hist.sum(axis=-1, keepdims=True)
+    idx = np.minimum((cdf < q).sum(axis=-1), len(bins) - 2)
+    return (bins[idx] + bins[idx + 1]) / 2
+
+
+def summarize(value_hist, dd_hist, terminal_sum, n_paths):
+    terminal = value_hist[-1]
+    centers = np.sqrt(value_bins[:-1] * value_bins[1:])
+    var = {}
+    cvar = {}
+    for level in (0.95, 0.99):
+        q = hist_quantile(terminal, value_bins, 1 - level)
+        tail = centers <= q
+        var[level] = 1 - q
+        cvar[level] = 1 - (terminal[tail] * centers[tail]).sum() / max(terminal[tail].sum(), 1)
+    return {
+        'paths': n_paths,
+        'fan': {p: hist_quantile(value_hist, value_bins, p / 100) for p in percentiles},
+        'mean': terminal_sum / n_paths,
+        'prob_loss': terminal[centers < 1].sum() / n_paths,
+        'var': var,
+        'cvar': cvar,
+        'mdd_median': hist_quantile(dd_hist, drawdown_bins, 0.5),
+        'mdd_p95': hist_quantile(dd_hist, drawdown_bins, 0.95),
+    }
+
+
+def process_pool(workers=None):
+    # 스레드가 여러 개인 프로세스(Streamlit 서버 등)에서 fork 하면 잠금 상태가 복제되어 교착될 수 있으므로 spawn 사용
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn'))
+
+
+def iter_projection(df_pf, years=10, n_paths=100000, chunk_size=20000, workers=None, seed=0, corr=None, pool=None):
+    # 청크가 완료될 때마다 (완료 경로 수, 누적 요약) 을 반환 - 진행률 표시용
+    # pool 을 주면 새 프로세스 풀을 만들지 않고 공유 풀에서 실행 (앱/서비스는 프로세스당 하나의 풀을 재사용)
+    weights = (df_pf['금액'] / df_pf['금액'].sum()).to_numpy(dtype=float)
+    mu, vol, loading = holding_assumptions(df_pf)
+    chol = None if corr is None else np.linalg.cholesky(corr)  # 명시적 상관행렬을 준 경우에만 n x n 계산
+    n_steps = int(years * steps_per_year)
+
+    sizes = [chunk_size] * (n_paths // chunk_size)
+    if n_paths % chunk_size:
+        sizes.append(n_paths % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    value_hist = np.zeros((n_steps + 1, len(value_bins) - 1), dtype=np.int64)
+    dd_hist = np.zeros(len(drawdown_bins) - 1, dtype=np.int64)
+    terminal_sum = 0.0
+    done = 0
+    workers = workers or os.cpu_count() or 1
+    jobs = iter(zip(sizes, seeds))
+    with nullcontext(pool) if pool is not None else process_pool(workers) as pool:
+        # 동시에 대기 중인 청크 수를 제한해 결과 히스토그램이 메모리에 쌓이지 않도록 함
+        pending = {pool.submit(simulate_chunk, weights, mu, vol, loading, chol, n_steps, size, s)
+                   for size, s in islice(jobs, workers * 2)}
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in finished:
+                vh, dh, ts, n = f.result()
+                value_hist += vh
+                dd_hist += dh
+                terminal_sum += ts
+                done += n
+            pending |= {pool.submit(simulate_chunk, weights, mu, vol, loading, chol, n_steps, size, s)
+                        for size, s in islice(jobs, len(finished))}
+            yield done, summarize(value_hist, dd_hist, terminal_sum, done)
+
+
+def run_projection(df_pf, years=10, n_paths=100000, chunk_size=20000, workers=None, seed=0, corr=None, progress=None, pool=None):
+    result = None
+    for done, result in iter_projection(df_pf, years, n_paths, chunk_size, workers, seed, corr, pool):
+        if progress is not None:
+            progress(done, n_paths)
+    return result
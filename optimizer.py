@@ -0,0 +1,247 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# --- 핵심(Core) 비중 최적화 ---
+# 로컬 수익률 이력 파일(일자 x 종목, 기간 수익률)로 공분산을 추정하고
+# 최소분산 / 평균-분산 / 위험균형 방식으로 universe 의 weight 를 다시 계산합니다.
+# 공분산, 스텝 크기, 촐레스키 분해는 (파일, 수정 시각) 별로 캐시되므로
+# 비중 상/하한이나 유형별 한도만 바꿀 때는 재추정 없이 최적화만 다시 수행합니다.
+# 캐시는 최근 사용 순으로 cache_size 개까지만 유지합니다 (파일 수정/종목 구성 변경이 잦아도 메모리가 늘지 않음).
+
+default_returns_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'returns.csv')
+periods_per_year = 252
+optimizer_modes = {
+    'min_variance': '최소분산',
+    'mean_variance': '평균-분산',
+    'risk_parity': '위험균형',
+}
+
+cache_size = 16
+
+_model_cache = OrderedDict()
+_warm_starts = OrderedDict()
+
+
+def cache_get(cache, key):
+    hit = cache.get(key)
+    if hit is not None:
+        cache.move_to_end(key)
+    return hit
+
+
+def cache_put(cache, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > cache_size:
+        cache.popitem(last=False)
+
+
+def load_returns(path):
+    df = pd.read_parquet(path) if str(path).endswith('.parquet') else pd.read_csv(path)
+    date_col = next((c for c in df.columns if str(c).lower() in ('date', 'datetime', 'timestamp')), None)
+    if date_col is not None:
+        df = df.set_index(date_col)
+    return df.apply(pd.to_numeric, errors='coerce')
+
+
+# Ledoit-Wolf 축소 추정 (목표: 평균 분산 x 단위행렬)
+def shrunk_covariance(x):
+    t, n = x.shape
+    x = x - x.mean(axis=0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    d2 = (np.sum(sample ** 2) - 2 * mu * np.trace(sample) + n * mu ** 2) / n
+    b2 = (np.sum(np.sum(x ** 2, axis=1) ** 2) / t - np.sum(sample ** 2)) / (t * n)
+    shrink = 1.0 if d2 <= 0 else min(max(b2 / d2, 0.0), 1.0)
+    cov = (1 - shrink) * sample
+    cov[np.diag_indices(n)] += shrink * mu
+    return cov, shrink
+
+
+# 수익률 이력이 퇴화된 경우(상수 열, 중복 열 등) 공분산이 양의 정부호가 아니면 LinAlgError 대신 파일을 가리키는 ValueError 로 알림
+def cholesky(cov, path):
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        raise ValueError(f"{path}: 수익률 이력의 공분산이 양의 정부호가 아닙니다 - 변동이 없거나 서로 중복된 종목 열이 없는지 확인하세요.") from None
+
+
+def largest_eigenvalue(cov, iters=50):
+    v = np.full(len(cov), 1 / np.sqrt(len(cov)))
+    for _ in range(iters):
+        w = cov @ v
+        v = w / np.linalg.norm(w)
+    return float(v @ cov @ v)
+
+
+def risk_model(path):
+    mtime = os.path.getmtime(path)
+    hit = cache_get(_model_cache, path)
+    if hit is not None and hit['mtime'] == mtime:
+        return hit
+
+    returns = load_returns(path).dropna(axis=1, how='all').fillna(0.0)
+    if returns.shape[0] < 2 or returns.shape[1] == 0:
+        raise ValueError(f"{path}: 공분산을 추정할 수익률 이력이 부족합니다.")
+    x = returns.to_numpy(np.float64)
+    cov, shrink = shrunk_covariance(x)
+    cov *= periods_per_year
+    chol = cholesky(cov, path)
+    model = {
+        'mtime': mtime,
+        'names': list(returns.columns),
+        'mu': x.mean(axis=0) * periods_per_year,
+        'cov': cov,
+        'shrink': shrink,
+        'lipschitz': largest_eigenvalue(cov),
+        'chol': chol,
+    }
+    cache_put(_model_cache, path, model)
+    return model
+
+
+# --- 제약 조건 투영 ---
+# 투영 해는 w_i = clip(v_i - max(tau, mu_g), lower, upper) 꼴입니다.
+# mu_g 는 유형 g 의 합계가 한도와 같아지는 이동량, tau 는 전체 합계가 1 이 되는 이동량이며
+# 모든 유형을 한 번에 이분법으로 풀어 O(n) 연산 수십 번으로 끝납니다.
+def bisect_shift(v, lower, upper, target, groups=None, n_groups=1, iters=60):
+    # 그룹별 sum(clip(v - shift, lower, upper)) = target 를 만족하는 shift (target 배열은 그룹별 값)
+    if groups is None:
+        groups = np.zeros(len(v), dtype=int)
+    lo = np.full(n_groups, (v - upper).min())
+    hi = np.full(n_groups, (v - lower).max())
+    for _ in range(iters):
+        mid = (lo + hi) / 2
+        sums = np.bincount(groups, np.clip(v - mid[groups], lower, upper), minlength=n_groups)
+        over = sums > target
+        lo = np.where(over, mid, lo)
+        hi = np.where(over, hi, mid)
+    return (lo + hi) / 2
+
+
+def project(v, lower, upper, groups=None, caps=None):
+    floor = -np.inf
+    if groups is not None:
+        floor = bisect_shift(v, lower, upper, caps, groups, len(caps))[groups]
+    lo, hi = (v - upper).min() - 1, (v - lower).max() + 1
+    for _ in range(60):
+        tau = (lo + hi) / 2
+        if np.clip(v - np.maximum(tau, floor), lower, upper).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - np.maximum((lo + hi) / 2, floor), lower, upper)
+
+
+def check_feasible(n, lower, upper, groups, caps):
+    if lower * n > 1 + 1e-9 or upper * n < 1 - 1e-9:
+        raise ValueError(f"비중 범위 [{lower:.1%}, {upper:.1%}] 로는 {n}개 종목의 합계 100%를 만들 수 없습니다.")
+    if groups is not None:
+        counts = np.bincount(groups, minlength=len(caps))
+        if np.minimum(caps, counts * upper).sum() < 1 - 1e-9 or (counts * lower > caps + 1e-9).any():
+            raise ValueError("유형별 한도와 비중 범위를 동시에 만족하는 배분이 없습니다.")
+
+
+# --- 최적화 ---
+def risk_parity_weights(cov, iters=500, tol=1e-10):
+    # 동일 위험기여(ERC): min 1/2 w'Σw - (1/n) Σ log w 의 좌표별 해를 한 번에 갱신하는 감쇠 Jacobi 반복
+    n = len(cov)
+    diag = np.diag(cov)
+    w = 1 / np.sqrt(diag * n)
+    for _ in range(iters):
+        off = cov @ w - diag * w
+        new = (-off + np.sqrt(off ** 2 + 4 * diag / n)) / (2 * diag)
+        if np.abs(new - w).max() < tol * new.max():
+            w = new
+            break
+        w = 0.5 * w + 0.5 * new
+    return w / w.sum()
+
+
+def optimize_weights(model, mode='min_variance', lower=0.0, upper=1.0, groups=None, caps=None,
+                     risk_aversion=3.0, warm_start=None, iters=3000, tol=1e-8):
+    cov, mu = model['cov'], model['mu']
+    n = len(mu)
+    check_feasible(n, lower, upper, groups, caps)
+
+    if mode == 'risk_parity':
+        return project(risk_parity_weights(cov), lower, upper, groups, caps)
+    if mode == 'min_variance':
+        scale, linear = 1.0, np.zeros(n)
+    elif mode == 'mean_variance':
+        scale, linear = risk_aversion, mu
+    else:
+        raise ValueError(f"지원하지 않는 최적화 방식입니다: {mode}")
+
+    if warm_start is None:
+        # 캐시된 촐레스키 분해로 무제약 최소분산 해를 구해 시작점으로 사용
+        ones = np.linalg.solve(model['chol'].T, np.linalg.solve(model['chol'], np.ones(n)))
+        warm_start = ones / ones.sum()
+    w = project(np.asarray(warm_start, dtype=float), lower, upper, groups, caps)
+
+    # 가속 투영 경사법 (FISTA, 진동 시 모멘텀 재시작): f(w) = scale/2 w'Σw - μ'w
+    step = 1 / (scale * model['lipschitz'])
+    y, t = w, 1.0
+    for _ in range(iters):
+        w_next = project(y - step * (scale * (cov @ y) - linear), lower, upper, groups, caps)
+        if np.abs(w_next - w).max() < tol:
+            return w_next
+        if np.dot(y - w_next, w_next - w) > 0:
+            y, t = w_next, 1.0
+        else:
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + ((t - 1) / t_next) * (w_next - w)
+            t = t_next
+        w = w_next
+    return w
+
+
+def missing_returns(universe, returns_path):
+    # 수익률 이력이 없어 최적화하지 못하는 종목 (원래 비중 유지)
+    names = set(risk_model(returns_path)['names'])
+    return [name for name in universe['name'] if name not in names]
+
+
+def optimize_universe(universe, returns_path, mode='min_variance', lower=0.0, upper=1.0, group_caps=None, risk_aversion=3.0):
+    # 수익률 이력이 있는 종목의 weight 만 최적화하고, 이력이 없는 종목(missing_returns)은 원래 비중을 그대로 유지합니다.
+    # 최적화 대상은 남은 비중(budget)을 나눠 가지며, 비중 범위와 유형별 한도는 전체 포트폴리오 기준으로 적용됩니다.
+    model = risk_model(returns_path)
+    index = {name: i for i, name in enumerate(model['names'])}
+    optimized = universe['name'].isin(index).to_numpy()
+    members = universe[optimized].reset_index(drop=True)
+    if members.empty:
+        raise ValueError(f"{returns_path}: 유니버스 종목과 일치하는 수익률 이력이 없습니다.")
+    universe = universe.assign(weight=universe['weight'] / universe['weight'].sum())
+    fixed = universe[~optimized]
+    budget = 1.0 - float(fixed['weight'].sum())
+    if budget <= 1e-9:
+        raise ValueError(f"{returns_path}: 수익률 이력이 있는 종목의 비중이 0 입니다.")
+    cols = np.array([index[name] for name in members['name']])
+    sub_key = (returns_path, model['mtime'], tuple(members['name']))
+    sub = cache_get(_model_cache, sub_key)
+    if sub is None:
+        if len(cols) == len(model['names']) and (cols == np.arange(len(cols))).all():
+            sub = model
+        else:
+            cov = model['cov'][np.ix_(cols, cols)]
+            chol = cholesky(cov, returns_path)
+            sub = {'mu': model['mu'][cols], 'cov': cov, 'lipschitz': largest_eigenvalue(cov), 'chol': chol}
+        cache_put(_model_cache, sub_key, sub)
+
+    groups = caps = None
+    if group_caps:
+        kinds = members['type'].astype(str)
+        labels = list(dict.fromkeys(kinds))
+        groups = np.array([labels.index(k) for k in kinds])
+        fixed_by_kind = fixed.groupby(fixed['type'].astype(str))['weight'].sum()
+        caps = np.array([max(group_caps.get(k, 1.0) - fixed_by_kind.get(k, 0.0), 0.0) / budget for k in labels])
+
+    key = sub_key + (mode,)
+    weights = optimize_weights(sub, mode, lower / budget, min(upper / budget, 1.0), groups, caps, risk_aversion, cache_get(_warm_starts, key))
+    cache_put(_warm_starts, key, weights)
+
+    universe.loc[optimized, 'weight'] = weights * budget
+    return universe
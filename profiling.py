@@ -0,0 +1,67 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# --- 단계별 소요 시간 측정 (선택 사항) ---
+# PF_PROFILE=1 환경 변수 또는 ?debug=1 쿼리로 켜며, 꺼져 있으면 stage() 는 아무 일도 하지 않습니다.
+# 한 번의 스크립트 실행(run) 동안 단계별 (이름, 소요 ms, 메모리 피크 KB) 를 모으고
+# PF_PROFILE_LOG 경로가 있으면 실행마다 JSON 한 줄(JSON Lines)로 덧붙여 기록합니다.
+# 메모리 피크는 tracemalloc 이 켜져 있을 때(벤치마크 등)만 기록됩니다.
+
+profile_env = 'PF_PROFILE'
+profile_log_env = 'PF_PROFILE_LOG'
+
+
+def profiling_enabled(query_params=None):
+    if os.environ.get(profile_env, '') not in ('', '0'):
+        return True
+    return query_params is not None and query_params.get('debug') == '1'
+
+
+def new_run(enabled, **context):
+    return {'enabled': enabled, 'started': time.time(), 'clock': time.perf_counter(), 'context': context, 'stages': [], 'marks': {}}
+
+
+@contextmanager
+def stage(run, name):
+    if not run['enabled']:
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = {'stage': name, 'ms': (time.perf_counter() - start) * 1000}
+        if tracing:
+            record['peak_kb'] = (tracemalloc.get_traced_memory()[1] - base) / 1024
+        run['stages'].append(record)
+
+
+# 실행 시작부터 특정 시점까지의 경과 시간 (예: first_render = 첫 화면 요소 전송 완료)
+def mark(run, name):
+    if run['enabled']:
+        run['marks'][name] = (time.perf_counter() - run['clock']) * 1000
+
+
+def run_total_ms(run):
+    return sum(s['ms'] for s in run['stages'])
+
+
+def export_run(run, path=None):
+    path = path or os.environ.get(profile_log_env)
+    if not run['enabled'] or not path:
+        return
+    line = {'time': run['started'], 'total_ms': run_total_ms(run), **run['context'], 'marks': run['marks'], 'stages': run['stages']}
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+
+def read_runs(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
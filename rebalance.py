@@ -0,0 +1,183 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_allocate import read_table, write_table
+from engine import batch_summary_columns, cash_holding, run_model
+
+# --- 리밸런싱 주문 생성 ---
+# 현재 보유(계좌, 종목, 수량) 와 목표 비중(df_pf 또는 배치 배분 결과) 을 비교해 최소 주문 목록을 만듭니다.
+# 모든 계좌를 하나의 긴(long) 테이블로 합쳐 merge/groupby 로 한 번에 계산합니다.
+#
+# positions: account(선택), name, quantity [, price, lot_size]  - 현금은 name 이 현금 종목이고 quantity 가 금액
+# prices:    name, price [, lot_size]
+
+cash_name = cash_holding['name']
+default_account = 'default'
+
+
+def target_weights(df_pf):
+    # df_pf -> (name, weight) : 모든 계좌에 같은 목표를 적용할 때 사용
+    return pd.DataFrame({'name': df_pf['종목'].to_numpy(), 'weight': (df_pf['금액'] / df_pf['금액'].sum()).to_numpy()})
+
+
+def targets_from_allocations(alloc, account_col):
+    # batch_allocate 결과(고객별 종목 금액 컬럼) -> (account, name, weight)
+    # 종목 컬럼은 allocate_batch 가 요약 컬럼(batch_summary_columns) 뒤에 붙인 컬럼만 사용합니다.
+    # 그 앞의 고객 입력 컬럼(나이, 고객 번호 등 숫자 컬럼 포함)은 종목으로 취급하지 않습니다.
+    missing = [c for c in [account_col] + batch_summary_columns if c not in alloc.columns]
+    if missing:
+        raise ValueError(f"배치 배분 결과 파일에 필요한 컬럼이 없습니다: {', '.join(missing)}")
+    columns = list(alloc.columns)
+    holdings = [c for c in columns[columns.index(batch_summary_columns[-1]) + 1:] if c != account_col]
+    if not holdings:
+        raise ValueError("배치 배분 결과 파일에 종목별 금액 컬럼이 없습니다.")
+    long = alloc.melt(id_vars=[account_col], value_vars=holdings, var_name='name', value_name='amount')
+    total = long.groupby(account_col)['amount'].transform('sum')
+    long['weight'] = np.where(total > 0, long['amount'] / total.where(total > 0, 1), 0.0)
+    return long.rename(columns={account_col: 'account'})[['account', 'name', 'weight']]
+
+
+def validate_prices(prices):
+    # 종목당 가격은 한 행이어야 함 (중복 행이 있으면 merge 가 보유 행을 늘려 수량이 중복 집계됨)
+    dup = prices['name'][prices['name'].duplicated()]
+    if len(dup):
+        raise ValueError(f"가격 파일에 중복된 종목이 있습니다: {', '.join(map(str, dup.unique()[:5]))}")
+
+
+def normalize_positions(positions, prices=None):
+    pos = positions.copy()
+    if 'account' not in pos.columns:
+        pos['account'] = default_account
+    if 'price' not in pos.columns:
+        pos['price'] = np.nan
+    if 'lot_size' not in pos.columns:
+        pos['lot_size'] = np.nan
+    if prices is not None:
+        validate_prices(prices)
+        # 가격 파일 값을 우선 사용하고, 없으면 보유 파일의 값을 사용
+        px = prices.rename(columns={'price': '_price', 'lot_size': '_lot'})
+        pos = pos.merge(px, on='name', how='left')
+        pos['price'] = pos['_price'].combine_first(pos['price'])
+        if '_lot' in pos.columns:
+            pos['lot_size'] = pos['_lot'].combine_first(pos['lot_size'])
+        pos = pos.drop(columns=[c for c in ('_price', '_lot') if c in pos.columns])
+    cash = pos['name'] == cash_name
+    pos.loc[cash, ['price', 'lot_size']] = 1
+    pos['lot_size'] = pos['lot_size'].fillna(1)
+    return pos.groupby(['account', 'name'], as_index=False).agg(quantity=('quantity', 'sum'), price=('price', 'first'), lot_size=('lot_size', 'first'))
+
+
+def unpriced_targets(positions, targets, prices=None):
+    # 목표 비중이 있지만 가격을 알 수 없는 종목 (보유하지 않은 신규 종목에 가격 파일이 없는 경우) - 이 종목은 매수되지 않음
+    priced = set(positions.loc[positions['price'].notna(), 'name']) if 'price' in positions.columns else set()
+    if prices is not None:
+        priced |= set(prices.loc[prices['price'].notna(), 'name'])
+    wanted = targets.loc[targets['weight'] > 0, 'name']
+    return sorted({name for name in wanted if name != cash_name and name not in priced}, key=str)
+
+
+def generate_orders(positions, targets, prices=None, tolerance=0.01, min_trade=100000):
+    # tolerance: 목표 대비 괴리가 계좌 평가액의 이 비율 이하면 거래하지 않음 (허용 밴드)
+    # min_trade: 이 금액 미만의 주문은 생략
+    pos = normalize_positions(positions, prices)
+    if pos.loc[pos['name'] != cash_name, 'price'].isna().any():
+        missing = pos.loc[pos['price'].isna(), 'name'].unique()
+        raise ValueError(f"가격 정보가 없는 보유 종목이 있습니다: {', '.join(map(str, missing[:5]))}")
+    pos['value'] = pos['quantity'] * pos['price']
+    nav = pos.groupby('account')['value'].sum().rename('nav')
+
+    if 'account' not in targets.columns:
+        targets = nav.index.to_frame(index=False).merge(targets, how='cross')
+    book = pos.merge(targets, on=['account', 'name'], how='outer').merge(nav, on='account', how='inner')
+    if prices is not None:
+        # 종목명으로 조회 (book 의 인덱스/행 순서와 무관)
+        px = prices.set_index('name')
+        book['price'] = book['price'].fillna(book['name'].map(px['price']))
+        if 'lot_size' in px.columns:
+            book['lot_size'] = book['lot_size'].fillna(book['name'].map(px['lot_size']))
+    book.loc[book['name'] == cash_name, ['price', 'lot_size']] = 1
+    book = book.fillna({'quantity': 0.0, 'value': 0.0, 'weight': 0.0, 'lot_size': 1})
+
+    # 1) 허용 밴드/최소 금액 안쪽이면 거래하지 않고, 로트 단위로 0 방향 반올림
+    is_cash = book['name'] == cash_name
+    diff = book['weight'] * book['nav'] - book['value']
+    tradable = ~is_cash & book['price'].notna() & (diff.abs() > tolerance * book['nav']) & (diff.abs() >= min_trade)
+    lots = np.trunc(diff / (book['price'] * book['lot_size']))
+    qty = np.where(tradable, lots * book['lot_size'], 0.0)
+
+    # 2) 현금 버퍼: 매수 총액이 (현금 + 매도 대금 - 목표 현금) 을 넘으면 매수를 비례 축소
+    trade_value = qty * book['price'].fillna(0)
+    buys = pd.Series(np.maximum(trade_value, 0), index=book.index).groupby(book['account']).transform('sum')
+    sells = pd.Series(np.maximum(-trade_value, 0), index=book.index).groupby(book['account']).transform('sum')
+    cash_now = book['value'].where(is_cash, 0).groupby(book['account']).transform('sum')
+    cash_floor = (book['weight'] * book['nav']).where(is_cash, 0).groupby(book['account']).transform('sum')
+    budget = np.maximum(cash_now + sells - cash_floor, 0)
+    scale = np.where(buys > budget, budget / buys.where(buys > 0, 1), 1.0)
+    buy_lots = np.floor(qty * scale / book['lot_size']) * book['lot_size']
+    qty = np.where(qty > 0, buy_lots, qty)
+    value = qty * book['price'].fillna(0)
+    qty = np.where((qty != 0) & (np.abs(value) >= min_trade), qty, 0.0)
+
+    book['order_qty'] = qty
+    orders = book.loc[book['order_qty'] != 0, ['account', 'name', 'order_qty', 'price']].copy()
+    orders['side'] = np.where(orders['order_qty'] > 0, 'BUY', 'SELL')
+    orders['quantity'] = orders['order_qty'].abs()
+    orders['value'] = orders['quantity'] * orders['price']
+    orders = orders[['account', 'name', 'side', 'quantity', 'price', 'value']].sort_values(['account', 'side', 'value'], ascending=[True, False, False])
+
+    signed = book['order_qty'] * book['price'].fillna(0)
+    summary = pd.DataFrame({
+        'nav': nav,
+        'buy_value': signed.clip(lower=0).groupby(book['account']).sum(),
+        'sell_value': (-signed).clip(lower=0).groupby(book['account']).sum(),
+        'orders': (book['order_qty'] != 0).groupby(book['account']).sum(),
+    })
+    summary['cash_after'] = book['value'].where(is_cash, 0).groupby(book['account']).sum() - summary['buy_value'] + summary['sell_value']
+    summary['turnover'] = (summary['buy_value'] + summary['sell_value']) / summary['nav'].where(summary['nav'] > 0, 1)
+    return orders.reset_index(drop=True), summary.reset_index(names='account')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="리밸런싱 주문 생성")
+    parser.add_argument('positions', help="현재 보유 파일: account, name, quantity [, price, lot_size]")
+    parser.add_argument('output', help="주문 결과 파일 (.csv / .parquet)")
+    parser.add_argument('--prices', help="가격 파일: name, price [, lot_size]")
+    parser.add_argument('--allocations', help="batch_allocate.py 결과 파일 (계좌별 목표)")
+    parser.add_argument('--account-col', default='client_id', help="배치 결과의 계좌 식별 컬럼")
+    parser.add_argument('--lw', type=float, default=50, help="공통 목표 산출용 LW 강도 (--allocations 미사용 시)")
+    parser.add_argument('--sentiment', type=float, default=50, help="공통 목표 산출용 대중 심리")
+    parser.add_argument('--consensus', type=float, default=3, help="공통 목표 산출용 컨센서스")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="허용 밴드 (계좌 평가액 대비 비율)")
+    parser.add_argument('--min-trade', type=float, default=100000, help="최소 주문 금액 (원)")
+    args = parser.parse_args(argv)
+
+    try:
+        positions = read_table(args.positions)
+        prices = read_table(args.prices) if args.prices else None
+        if args.allocations:
+            if 'account' not in positions.columns:
+                raise ValueError(f"{args.positions}: --allocations 사용 시 보유 파일에 account 컬럼이 필요합니다.")
+            targets = targets_from_allocations(read_table(args.allocations), args.account_col)
+            positions['account'] = positions['account'].astype(targets['account'].dtype)
+        else:
+            # 목표 비중은 자본 규모와 무관하므로 한 번만 계산해 모든 계좌에 적용
+            targets = target_weights(run_model(1.0, args.lw, args.sentiment, args.consensus)[2])
+        unpriced = unpriced_targets(positions, targets, prices)
+        orders, summary = generate_orders(positions, targets, prices, args.tolerance, args.min_trade)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if unpriced:
+        print(f"경고: 가격 정보가 없어 매수하지 않은 목표 종목 {len(unpriced):,}개 (--prices 로 가격 지정): "
+              + ", ".join(map(str, unpriced[:5])) + (" 외" if len(unpriced) > 5 else ""), file=sys.stderr)
+    write_table(orders, args.output)
+    print(f"{len(summary):,}개 계좌, {len(orders):,}건 주문 -> {args.output}")
+    print(f"총 매수 {summary['buy_value'].sum():,.0f}원 / 총 매도 {summary['sell_value'].sum():,.0f}원")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+# --- 실행 기록 저장소 (SQLite, 추가 전용) ---
+# 모델 실행마다 입력값 + 결과(트랙별 금액, 신호, 종목별 배분)를 저장하고, 프로젝션 결과는 실행에 덧붙여 저장합니다.
+# run_id 는 입력값의 내용 해시이므로 같은 입력을 다시 실행하면 아무것도 쓰지 않습니다(중복 제거).
+# 종목별 배분은 결과 포트폴리오의 내용 해시(portfolio_id)로 한 번만 저장하고 여러 실행이 공유합니다.
+# 기록은 수정/삭제하지 않으며, 비교/추이 조회는 SQL 집계로 필요한 행만 읽어 전체 이력을 메모리에 올리지 않습니다.
+
+default_store_path = os.environ.get('PF_RUNSTORE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'runs.sqlite')
+
+schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created TEXT NOT NULL,
+    capital REAL, lw_strength REAL, sentiment REAL, consensus REAL,
+    tac_level INTEGER, str_level INTEGER, opt_mode TEXT,
+    signal TEXT, stance TEXT,
+    tac_stock REAL, tac_cash REAL, str_stock REAL, str_cash REAL,
+    portfolio_id TEXT NOT NULL, inputs TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created);
+CREATE INDEX IF NOT EXISTS runs_params ON runs (capital, lw_strength, sentiment, consensus);
+CREATE TABLE IF NOT EXISTS holdings (
+    portfolio_id TEXT NOT NULL, name TEXT NOT NULL, type TEXT, amount REAL, weight_pct REAL,
+    PRIMARY KEY (portfolio_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS portfolio_types (
+    portfolio_id TEXT NOT NULL, type TEXT NOT NULL, amount REAL, weight_pct REAL, holdings INTEGER,
+    PRIMARY KEY (portfolio_id, type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS projections (
+    run_id TEXT NOT NULL, kind TEXT NOT NULL, params TEXT NOT NULL, created TEXT NOT NULL, summary TEXT,
+    PRIMARY KEY (run_id, kind, params)
+) WITHOUT ROWID;
+"""
+
+# 이미 저장된 run_id / portfolio_id (경로별) - 같은 입력의 재실행은 DB 조회 없이 건너뜀
+_known = {}
+
+
+def connect(path=default_store_path):
+    con = sqlite3.connect(path, timeout=10)
+    if path not in _known:
+        con.execute('PRAGMA journal_mode=WAL')
+        con.executescript(schema)
+        _known[path] = set()
+    return con
+
+
+def run_hash(inputs):
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')).hexdigest()[:20]
+
+
+def portfolio_hash(df_pf):
+    # 종목/유형/금액 내용 해시 - 입력이 달라도 결과 포트폴리오가 같으면 종목 행을 다시 쓰지 않음
+    rows = pd.util.hash_pandas_object(df_pf[['종목', '유형', '금액']].astype({'유형': str}), index=False)
+    return 'p' + hashlib.sha256(rows.to_numpy().tobytes()).hexdigest()[:19]
+
+
+def now():
+    return time.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def save_run(inputs, tac, stra, df_pf, path=default_store_path):
+    # inputs: capital, lw_strength, sentiment, consensus 를 포함한 입력 dict (그 외 키도 해시에 포함)
+    # 반환: (run_id, 새로 저장했는지 여부)
+    run_id = run_hash(inputs)
+    if run_id in _known.get(path, ()):
+        return run_id, False
+    portfolio_id = portfolio_hash(df_pf)
+    con = connect(path)
+    try:
+        with con:
+            cur = con.execute(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, now(), float(inputs['capital']), float(inputs['lw_strength']), float(inputs['sentiment']), float(inputs['consensus']),
+                 int(inputs.get('tac_level', -1)), int(inputs.get('str_level', -1)), str(inputs.get('opt_mode', 'fixed')),
+                 tac[2], stra[2], float(tac[0]), float(tac[1]), float(stra[0]), float(stra[1]), portfolio_id,
+                 json.dumps(inputs, sort_keys=True, default=str, ensure_ascii=False)))
+            inserted = cur.rowcount > 0
+            if inserted and portfolio_id not in _known[path] and \
+                    con.execute("SELECT 1 FROM portfolio_types WHERE portfolio_id = ? LIMIT 1", (portfolio_id,)).fetchone() is None:
+                kinds = df_pf['유형'].astype(str)
+                con.executemany("INSERT INTO holdings VALUES (?, ?, ?, ?, ?)",
+                                zip([portfolio_id] * len(df_pf), df_pf['종목'], kinds, df_pf['금액'].astype(float), df_pf['비중'].astype(float)))
+                by_type = df_pf.groupby(kinds, observed=True).agg(amount=('금액', 'sum'), weight=('비중', 'sum'), n=('종목', 'size'))
+                con.executemany("INSERT INTO portfolio_types VALUES (?, ?, ?, ?, ?)",
+                                [(portfolio_id, k, float(r.amount), float(r.weight), int(r.n)) for k, r in by_type.iterrows()])
+    finally:
+        con.close()
+    _known[path].update((run_id, portfolio_id))
+    return run_id, inserted
+
+
+def projection_summary(result):
+    # montecarlo.run_projection 결과 -> 저장용 요약 (만기 백분위 배수와 위험 지표)
+    return {
+        'paths': int(result['paths']),
+        'fan_end': {str(p): float(v[-1]) for p, v in result['fan'].items()},
+        'mean': float(result['mean']),
+        'prob_loss': float(result['prob_loss']),
+        'var_95': float(result['var'][0.95]),
+        'cvar_95': float(result['cvar'][0.95]),
+        'mdd_median': float(result['mdd_median']),
+    }
+
+
+def save_projection(run_id, kind, params, summary, path=default_store_path):
+    con = connect(path)
+    try:
+        with con:
+            con.execute("INSERT OR IGNORE INTO projections VALUES (?, ?, ?, ?, ?)",
+                        (run_id, kind, json.dumps(params, sort_keys=True, default=str), now(), json.dumps(summary)))
+    finally:
+        con.close()
+
+
+def query(sql, params=(), path=default_store_path):
+    con = connect(path)
+    try:
+        return pd.read_sql_query(sql, con, params=params)
+    finally:
+        con.close()
+
+
+def list_runs(since=None, until=None, limit=500, path=default_store_path, **filters):
+    # 날짜(created, 'YYYY-MM-DD' 또는 전체 시각) 범위와 입력값 일치 조건(capital=..., consensus=...)으로 조회
+    # 추가 전용이므로 rowid 가 저장 순서이며, 같은 초에 저장된 실행도 최신순으로 정렬됩니다.
+    where, params = [], []
+    if since:
+        where.append("created >= ?")
+        params.append(since)
+    if until:
+        where.append("created < ?")
+        params.append(until)
+    for column, value in filters.items():
+        if column not in ('capital', 'lw_strength', 'sentiment', 'consensus', 'tac_level', 'str_level', 'opt_mode'):
+            raise ValueError(f"조회할 수 없는 조건입니다: {column}")
+        where.append(f"{column} = ?")
+        params.append(value)
+    sql = "SELECT run_id, created, capital, lw_strength, sentiment, consensus, opt_mode, signal, stance, tac_stock, tac_cash, str_stock, str_cash, portfolio_id FROM runs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY rowid DESC LIMIT ?"
+    return query(sql, params + [int(limit)], path)
+
+
+def compare_runs(run_a, run_b, changed_only=True, path=default_store_path):
+    # 두 실행의 종목별 금액/비중 차이 (한쪽에만 있는 종목은 0 으로 간주), 변화가 큰 순
+    # 두 실행이 같은 포트폴리오를 공유하면 종목 행을 읽지 않고 바로 반환합니다.
+    sql = """
+        WITH ids AS (SELECT (SELECT portfolio_id FROM runs WHERE run_id = ?) AS pa, (SELECT portfolio_id FROM runs WHERE run_id = ?) AS pb)
+        SELECT a.name, a.type, a.amount AS amount_a, COALESCE(b.amount, 0) AS amount_b,
+               a.weight_pct AS weight_a, COALESCE(b.weight_pct, 0) AS weight_b
+        FROM ids JOIN holdings a ON a.portfolio_id = ids.pa
+        LEFT JOIN holdings b ON b.portfolio_id = ids.pb AND b.name = a.name
+        WHERE ids.pa != ids.pb AND (? = 0 OR b.amount IS NULL OR ABS(a.amount - b.amount) > 0.5)
+        UNION ALL
+        SELECT b.name, b.type, 0, b.amount, 0, b.weight_pct
+        FROM ids JOIN holdings b ON b.portfolio_id = ids.pb
+        WHERE ids.pa != ids.pb AND NOT EXISTS (SELECT 1 FROM holdings a WHERE a.portfolio_id = ids.pa AND a.name = b.name)
+    """
+    diff = query(sql, (run_a, run_b, int(changed_only)), path)
+    diff['amount_diff'] = diff['amount_b'] - diff['amount_a']
+    diff['weight_diff'] = diff['weight_b'] - diff['weight_a']
+    return diff.reindex(diff['amount_diff'].abs().sort_values(ascending=False).index).reset_index(drop=True)
+
+
+def allocation_history(by='type', top=10, max_runs=500, since=None, path=default_store_path):
+    # 최근 max_runs 개 실행의 비중 추이 (long 형식: created, run_id, key, weight_pct)
+    # by='type' 은 저장 시 미리 집계한 유형별 합계, by='name' 은 가장 최근 실행의 비중 상위 top 개 종목을
+    # (portfolio_id, name) 키로만 찾아 읽으므로 저장된 종목 행 전체를 훑지 않습니다.
+    recent = "SELECT rowid AS seq, run_id, created, portfolio_id FROM runs" + (" WHERE created >= ?" if since else "") + " ORDER BY rowid DESC LIMIT ?"
+    params = ([since] if since else []) + [int(max_runs)]
+    if by == 'type':
+        sql = f"""
+            SELECT r.created, r.run_id, t.type AS key, t.weight_pct
+            FROM ({recent}) r JOIN portfolio_types t ON t.portfolio_id = r.portfolio_id
+            ORDER BY r.seq
+        """
+    elif by == 'name':
+        sql = f"""
+            WITH r AS ({recent}),
+                 picked AS (SELECT h.name FROM holdings h
+                            WHERE h.portfolio_id = (SELECT portfolio_id FROM r ORDER BY seq DESC LIMIT 1)
+                            ORDER BY h.weight_pct DESC LIMIT ?)
+            SELECT r.created, r.run_id, p.name AS key, COALESCE(h.weight_pct, 0) AS weight_pct
+            FROM r CROSS JOIN picked p
+            LEFT JOIN holdings h ON h.portfolio_id = r.portfolio_id AND h.name = p.name
+            ORDER BY r.seq
+        """
+        params.append(int(top))
+    else:
+        raise ValueError(f"지원하지 않는 집계 기준입니다: {by}")
+    return query(sql, params, path)
+
+
+def run_projections(run_id, path=default_store_path):
+    out = query("SELECT kind, params, created, summary FROM projections WHERE run_id = ? ORDER BY created", (run_id,), path)
+    out['params'] = out['params'].map(json.loads)
+    out['summary'] = out['summary'].map(json.loads)
+    return out
@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from engine import allocate_batch, batch_summary_columns, cash_holding, run_model_levels, strategic_level, tactical_holding, tactical_level
+from montecarlo import process_pool, run_projection
+from runstore import projection_summary
+from universe import default_universe_path, load_universe
+
+# --- 배분 API 서비스 (asyncio HTTP/JSON, 외부 의존성 없음) ---
+# 사용법: python service.py [--port 8600] [--window-ms 5] [--max-batch 1024]
+#
+# POST /allocate  {"capital", "lw_strength", "sentiment", "consensus" [, "holdings": true]}
+#   -> Track A/B 금액과 신호 (+ 종목별 금액). window 동안 모인 요청을 allocate_batch 한 번으로 계산합니다.
+# POST /project   {"capital", "lw_strength", "sentiment", "consensus" [, "years", "paths"]}
+#   -> 몬테카를로 요약. 공유 프로세스 풀에서 실행하고, 같은 (구간, 기간, 경로 수) 결과는 재사용합니다.
+# GET  /health, GET /stats
+
+max_body = 1 << 20
+max_paths = 5_000_000
+projection_cache_size = 256
+statuses = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def json_number(body, key, default=None):
+    # JSON 숫자만 허용 (문자열 "10", true/false, Infinity/NaN 거부)
+    if key not in body and default is not None:
+        return default
+    if key not in body:
+        raise ValueError(f"필수 항목이 없습니다: {key}")
+    value = body[key]
+    try:
+        valid = not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value)
+    except OverflowError:  # float 범위를 넘는 정수
+        valid = False
+    if not valid:
+        raise ValueError(f"{key} 는 유한한 숫자여야 합니다.")
+    return value
+
+
+def json_integer(body, key, default):
+    value = json_number(body, key, default)
+    if value != int(value):
+        raise ValueError(f"{key} 는 정수여야 합니다.")
+    return int(value)
+
+
+def parse_allocation(body):
+    holdings = body.get('holdings', False)
+    if not isinstance(holdings, bool):
+        raise ValueError("holdings 는 true 또는 false 여야 합니다.")
+    params = {key: float(json_number(body, key)) for key in ('capital', 'lw_strength', 'sentiment', 'consensus')}
+    params['holdings'] = holdings
+    if params['capital'] < 0 or not 0 <= params['lw_strength'] <= 100 or not 0 <= params['sentiment'] <= 100 or not 1 <= params['consensus'] <= 5:
+        raise ValueError("입력 범위: capital >= 0, lw_strength/sentiment 0~100, consensus 1~5")
+    return params
+
+
+def evaluate_batch(batch, universe):
+    # 요청 목록 -> 응답 목록 (벡터화 배치 1회)
+    columns = {k: np.array([p[k] for p in batch]) for k in ('capital', 'lw_strength', 'sentiment', 'consensus')}
+    with_holdings = any(p['holdings'] for p in batch)
+    out = allocate_batch(columns['capital'], columns['lw_strength'], columns['sentiment'], columns['consensus'], universe, with_holdings)
+    summary = [dict(zip(batch_summary_columns, row)) for row in zip(*(out[c].tolist() for c in batch_summary_columns))]
+    if with_holdings:
+        names = list(universe['name']) + [tactical_holding['name'], cash_holding['name']]
+        amounts = out[names].to_numpy()
+        for i, p in enumerate(batch):
+            if p['holdings']:
+                summary[i]['holdings'] = dict(zip(names, amounts[i].tolist()))
+    return summary
+
+
+def create_service(universe, window=0.005, max_batch=1024, workers=None):
+    loop = asyncio.get_running_loop()
+    state = {'pending': [], 'timer': None, 'requests': 0, 'batches': 0, 'projections': 0, 'projection_hits': 0}
+    projections = {}
+    workers = workers or os.cpu_count() or 1
+    # 프로젝션: 청크 계산은 공유 프로세스 풀, 청크 배분/집계 루프는 전용 스레드에서 실행 (배치 계산 스레드와 분리)
+    # 여러 스레드가 동시에 풀을 쓰므로 spawn 풀(process_pool)을 사용 (fork 시 잠금 상태 복제로 인한 교착 방지)
+    pool = process_pool(workers)
+    drivers = ThreadPoolExecutor(max_workers=workers)
+
+    async def run_batch(batch):
+        try:
+            results = await loop.run_in_executor(None, evaluate_batch, [p for p, _ in batch], universe)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def flush():
+        if state['timer'] is not None:
+            state['timer'].cancel()
+            state['timer'] = None
+        batch, state['pending'] = state['pending'], []
+        if batch:
+            state['batches'] += 1
+            loop.create_task(run_batch(batch))
+
+    async def allocate(params):
+        future = loop.create_future()
+        state['pending'].append((params, future))
+        state['requests'] += 1
+        if len(state['pending']) >= max_batch:
+            flush()
+        elif state['timer'] is None:
+            state['timer'] = loop.call_later(window, flush)
+        return await future
+
+    async def project(params, years, paths):
+        # 포트폴리오 비중은 (전술 구간, 전략 구간) 에만 의존하고 결과는 초기 대비 배수이므로 자본과 무관하게 캐시
+        tac_lv = int(tactical_level(params['lw_strength']))
+        str_lv = int(strategic_level(params['sentiment'], params['consensus']))
+        key = (tac_lv, str_lv, years, paths)
+        state['projections'] += 1
+        future = projections.get(key)
+        if future is None:
+            df_pf = run_model_levels(1.0, tac_lv, str_lv, universe)[2]
+            future = loop.run_in_executor(drivers, lambda: projection_summary(run_projection(df_pf, years, paths, workers=workers, pool=pool)))
+            projections[key] = future
+            if len(projections) > projection_cache_size:
+                projections.pop(next(iter(projections)))
+        else:
+            state['projection_hits'] += 1
+        try:
+            summary = await asyncio.shield(future)
+        except Exception:
+            projections.pop(key, None)
+            raise
+        fan_end = summary['fan_end']
+        return {**summary, 'capital': params['capital'], 'tac_level': tac_lv, 'str_level': str_lv, 'years': years,
+                'value_end': {p: params['capital'] * v for p, v in fan_end.items()}}
+
+    def stats():
+        return {k: state[k] for k in ('requests', 'batches', 'projections', 'projection_hits')} | {
+            'avg_batch': state['requests'] / state['batches'] if state['batches'] else 0.0}
+
+    return {'allocate': allocate, 'project': project, 'stats': stats, 'pools': (drivers, pool)}
+
+
+async def route(service, method, path, body):
+    if path == '/health':
+        return 200, {'status': 'ok'}
+    if path == '/stats':
+        return 200, service['stats']()
+    if path not in ('/allocate', '/project'):
+        return 404, {'error': f"알 수 없는 경로입니다: {path}"}
+    if method != 'POST':
+        return 405, {'error': "POST 로 요청해야 합니다."}
+    try:
+        data = json.loads(body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+        params = parse_allocation(data)
+        if path == '/allocate':
+            return 200, await service['allocate'](params)
+        years = json_integer(data, 'years', 10)
+        paths = json_integer(data, 'paths', 100000)
+        if not 1 <= years <= 50 or not 1000 <= paths <= max_paths:
+            raise ValueError(f"years 는 1~50, paths 는 1,000~{max_paths:,} 범위여야 합니다.")
+        return 200, await service['project'](params, years, paths)
+    except ValueError as e:
+        return 400, {'error': str(e)}
+
+
+async def handle_connection(service, reader, writer):
+    # HTTP/1.1 keep-alive: 한 연결에서 요청을 순서대로 처리
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                break
+            if length > max_body:
+                status, payload = 413, {'error': "요청 본문이 너무 큽니다."}
+                body = None
+            else:
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await route(service, method, target.split('?', 1)[0], body)
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close' and body is not None
+            writer.write(f"HTTP/1.1 {status} {statuses[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, universe_path, window, max_batch, workers):
+    universe = load_universe(universe_path)
+    service = create_service(universe, window, max_batch, workers)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port, backlog=1024)
+    print(f"배분 서비스 시작: http://{host}:{port} (종목 {len(universe):,}개, 배치 창 {window * 1000:.1f}ms, 최대 {max_batch:,}건)", flush=True)
+    # SIGTERM/SIGINT 를 받으면 서버를 닫고 프로세스 풀을 정리 (spawn 작업 프로세스가 남지 않도록)
+    stopped = asyncio.get_running_loop().create_future()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        asyncio.get_running_loop().add_signal_handler(sig, lambda: stopped.done() or stopped.set_result(None))
+    try:
+        async with server:
+            await stopped
+    finally:
+        for executor in service['pools']:
+            executor.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Investment Master Model 배분 API 서비스")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--universe', default=default_universe_path, help="종목 유니버스 파일 (.csv / .parquet)")
+    parser.add_argument('--window-ms', type=float, default=5.0, help="요청을 모으는 배치 창 (밀리초)")
+    parser.add_argument('--max-batch', type=int, default=1024, help="배치당 최대 요청 수")
+    parser.add_argument('--workers', type=int, help="프로젝션용 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.universe, args.window_ms / 1000, args.max_batch, args.workers))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from backtest import breakout_triggers, time_columns
+
+# --- 시장 데이터 신호 파이프라인 (증분 갱신) ---
+# <signals_dir> 의 로컬 파일에서 사이드바 입력 3종을 일 단위로 산출합니다.
+#   prices.csv    (date, open, high, low, close)    -> lw_strength : 최근 lw_lookback 일 중 변동성 돌파(k) 발생 비율 (0~100)
+#   sentiment.csv (date, value 0~100)               -> sentiment   : 최근 sentiment_window 일 평균
+#   consensus.csv (date, rating 1~5, 날짜별 여러 행) -> consensus   : 최근 consensus_window 일 전체 의견 평균
+# 같은 날짜의 여러 행(분봉, 장중 갱신, 애널리스트별 의견)은 일 단위로 합칩니다. (.parquet 도 가능)
+#
+# 일별 집계값, 롤링 창의 누적합(prefix sum), 신호 값은 <signals_dir>/.sigcache/<이름>.npz 에 저장됩니다.
+# CSV 뒤에 행이 추가되면 지난번에 읽은 위치부터 새 행만 읽고, 겹치는 마지막 날짜부터(tail)만 다시 계산합니다.
+# 롤링 평균은 누적합의 차로 구하므로 갱신 계산량은 전체 이력 길이가 아니라 새 행 수에 비례합니다.
+# 파일 앞부분이 바뀌었거나(수정, 잘림) 과거 날짜가 끼어든 경우, 그리고 Parquet 은 전체를 다시 계산합니다.
+
+default_signals_dir = os.environ.get('PF_SIGNALS') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'signals')
+cache_dir_name = '.sigcache'
+default_params = {'lw_k': 0.5, 'lw_lookback': 20, 'sentiment_window': 5, 'consensus_window': 20}
+neutral_signals = {'lw_strength': 50.0, 'sentiment': 50.0, 'consensus': 3.0}
+fingerprint_bytes = 64
+
+# 원본 파일별 일 단위 집계: (저장 이름, 입력 컬럼, 집계 방법), 산출 신호 이름, 신호 파라미터
+sources = {
+    'prices': [('open', 'open', 'first'), ('high', 'high', 'max'), ('low', 'low', 'min'), ('close', 'close', 'last')],
+    'sentiment': [('value', 'value', 'last')],
+    'consensus': [('total', 'rating', 'sum'), ('count', 'rating', 'count')],
+}
+signal_names = {'prices': 'lw_strength', 'sentiment': 'sentiment', 'consensus': 'consensus'}
+source_params = {'prices': ('lw_k', 'lw_lookback'), 'sentiment': ('sentiment_window',), 'consensus': ('consensus_window',)}
+window_params = {'prices': 'lw_lookback', 'sentiment': 'sentiment_window', 'consensus': 'consensus_window'}
+
+# 이미 집계된 날짜에 같은 날짜의 새 행이 들어올 때의 병합 방법 (old, new)
+merge_ops = {
+    'first': lambda old, new: old,
+    'last': lambda old, new: np.where(np.isfinite(new), new, old),
+    'max': np.fmax,
+    'min': np.fmin,
+    'sum': np.add,
+    'count': np.add,
+}
+
+# 경로별 최근 상태 (프로세스 전역) - 같은 프로세스에서는 .npz 를 다시 읽지 않음
+_states = {}
+
+
+def find_source(data_dir, name):
+    for ext in ('.csv', '.parquet'):
+        path = os.path.join(data_dir, name + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def signals_version(data_dir=default_signals_dir):
+    # 원본 파일의 (이름, 크기, 수정 시각) - 캐시 키용, 파일이 하나도 없으면 None
+    version = []
+    for name in sources:
+        path = find_source(data_dir, name)
+        if path is not None:
+            stat = os.stat(path)
+            version.append((name, stat.st_size, stat.st_mtime_ns))
+    return tuple(version) or None
+
+
+def read_csv_rows(path, offset, header):
+    # offset 이후의 완전한 줄만 읽음 (기록 중인 마지막 줄은 다음 갱신으로 미룸) -> (DataFrame, 새 offset)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset
+    return pd.read_csv(io.BytesIO(header + chunk[:end])), offset + end
+
+
+def aggregate_days(df, spec, path):
+    # 원본 행 -> 일별 집계 {'day': 1970-01-01 기준 일수, 컬럼: 값}
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    time_col = next((c for c in time_columns if c in df.columns), None)
+    if time_col is None:
+        raise ValueError(f"{path}: 시간 컬럼({', '.join(time_columns)})이 없습니다.")
+    missing = sorted({column for _, column, _ in spec if column not in df.columns})
+    if missing:
+        raise ValueError(f"{path}: 필요한 컬럼이 없습니다: {', '.join(missing)}")
+    if df.empty:
+        return None
+
+    try:
+        day = pd.to_datetime(df[time_col]).to_numpy('datetime64[D]').astype(np.int64)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"{path}: 날짜를 읽을 수 없습니다: {e}")
+    order = np.argsort(day, kind='stable')
+    day = day[order]
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    ends = np.r_[starts[1:], len(day)]
+    out = {'day': day[starts]}
+    for name, column, how in spec:
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(np.float64)[order]
+        valid = np.isfinite(values)
+        if how == 'count':
+            out[name] = np.add.reduceat(valid.astype(np.float64), starts)
+        elif how == 'sum':
+            out[name] = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        elif how == 'max':
+            out[name] = np.fmax.reduceat(values, starts)
+        elif how == 'min':
+            out[name] = np.fmin.reduceat(values, starts)
+        elif how == 'first':
+            out[name] = values[starts]
+        else:
+            out[name] = values[ends - 1]
+    return out
+
+
+def empty_state(spec):
+    state = {'day': np.empty(0, np.int64), 'prefix_num': np.zeros(1), 'prefix_den': np.zeros(1), 'signal': np.empty(0)}
+    state.update({name: np.empty(0) for name, _, _ in spec})
+    return state
+
+
+def merge_days(state, new, spec):
+    # 새 일별 집계를 이어 붙이고 다시 계산할 시작 위치를 반환 (기존 마지막 날짜와 겹치면 그 날을 합쳐서 다시 계산)
+    # 과거 날짜가 끼어들면 None -> 전체 재계산
+    n = len(state['day'])
+    if n and new['day'][0] < state['day'][-1]:
+        return None
+    start = n
+    if n and new['day'][0] == state['day'][-1]:
+        start = n - 1
+        for name, _, how in spec:
+            new[name][0] = merge_ops[how](state[name][-1], new[name][0])
+    for key in ['day'] + [name for name, _, _ in spec]:
+        state[key] = np.concatenate([state[key][:start], new[key]])
+    return start
+
+
+def window_terms(name, state, start, params):
+    # start 이후 일자별 롤링 평균의 (분자, 분모)
+    if name == 'prices':
+        lo = max(start - 1, 0)  # 전일 변동폭이 필요하므로 하루 앞에서부터 계산
+        o, h, l = (state[c][lo:] for c in ('open', 'high', 'low'))
+        triggered = breakout_triggers(o, h, l, params['lw_k'])[1][start - lo:]
+        return triggered * 100.0, np.ones(len(triggered))
+    if name == 'sentiment':
+        values = state['value'][start:]
+        valid = np.isfinite(values)
+        return np.where(valid, values, 0.0), valid.astype(np.float64)
+    return state['total'][start:], state['count'][start:]
+
+
+def refresh_tail(name, state, start, params):
+    # start 이후의 누적합과 신호만 다시 계산 (그 앞의 창 누적합은 그대로 재사용)
+    num, den = window_terms(name, state, start, params)
+    for key, terms in (('prefix_num', num), ('prefix_den', den)):
+        state[key] = np.concatenate([state[key][:start + 1], state[key][start] + np.cumsum(terms)])
+    t = np.arange(start, len(state['day']))
+    lo = np.maximum(t + 1 - params[window_params[name]], 0)
+    total = state['prefix_num'][t + 1] - state['prefix_num'][lo]
+    count = state['prefix_den'][t + 1] - state['prefix_den'][lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tail = np.where(count > 0.5, total / count, np.nan)
+    state['signal'] = np.concatenate([state['signal'][:start], tail])
+
+
+def load_state(cache_file):
+    try:
+        with np.load(cache_file) as z:
+            state = {k: z[k] for k in z.files if k != 'meta'}
+            state['meta'] = json.loads(str(z['meta']))
+        return state
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def save_state(cache_file, state):
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp = cache_file + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(state['meta'])), **{k: v for k, v in state.items() if k != 'meta'})
+    os.replace(tmp, cache_file)
+
+
+def read_prefix(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(max(offset - fingerprint_bytes, 0))
+        return f.read(min(offset, fingerprint_bytes))
+
+
+def update_source(data_dir, name, params):
+    # 원본 파일 하나를 최신 상태로 갱신하여 반환 (파일이 없으면 None)
+    path = find_source(data_dir, name)
+    if path is None:
+        return None
+    spec = sources[name]
+    wanted = {k: params[k] for k in source_params[name]}
+    stat = os.stat(path)
+    cache_file = os.path.join(data_dir, cache_dir_name, name + '.npz')
+    state = _states.get(path) or load_state(cache_file)
+    meta = state['meta'] if state is not None else None
+    if meta is not None and meta.get('version') == [stat.st_size, stat.st_mtime_ns] and meta.get('params') == wanted:
+        _states[path] = state
+        return state
+
+    start = None
+    if meta is not None and meta.get('version') == [stat.st_size, stat.st_mtime_ns]:
+        start = 0  # 원본은 그대로이고 창/계수만 바뀜 -> 일별 집계는 재사용
+    elif meta is not None and path.endswith('.csv') and meta['offset'] <= stat.st_size:
+        header = meta['header'].encode('latin-1')
+        with open(path, 'rb') as f:
+            same_header = f.read(len(header)) == header
+        if same_header and read_prefix(path, meta['offset']).hex() == meta['fingerprint']:
+            df, offset = read_csv_rows(path, meta['offset'], header)
+            new = aggregate_days(df, spec, path) if df is not None else None
+            start = len(state['day']) if new is None else merge_days(state, new, spec)
+            if start is not None:
+                meta['offset'] = offset
+    if start is None:
+        # 전체 재계산
+        state, start = empty_state(spec), 0
+        if path.endswith('.csv'):
+            with open(path, 'rb') as f:
+                header = f.readline()
+            df, offset = read_csv_rows(path, len(header), header)
+        else:
+            df, offset, header = pd.read_parquet(path), stat.st_size, b''
+        new = aggregate_days(df, spec, path) if df is not None else None
+        if new is not None:
+            merge_days(state, new, spec)
+        meta = {'offset': offset, 'header': header.decode('latin-1')}
+    if meta.get('params') != wanted:
+        start = 0  # 행이 추가되면서 창/계수도 바뀐 경우 - 일별 집계만 재사용하고 신호는 처음부터 계산
+
+    refresh_tail(name, state, start, params)
+    meta.update(version=[stat.st_size, stat.st_mtime_ns], params=wanted, fingerprint=read_prefix(path, meta['offset']).hex())
+    state['meta'] = meta
+    save_state(cache_file, state)
+    _states[path] = state
+    return state
+
+
+def signal_history(data_dir=default_signals_dir, params=None):
+    # 일자 x (lw_strength, sentiment, consensus) - 파일마다 날짜가 다르면 직전 값으로 채움, 파일이 없는 신호는 컬럼 없음
+    params = {**default_params, **(params or {})}
+    series = {}
+    for name in sources:
+        state = update_source(data_dir, name, params)
+        if state is not None and len(state['day']):
+            series[signal_names[name]] = pd.Series(state['signal'], index=pd.to_datetime(state['day'], unit='D'))
+    if not series:
+        return pd.DataFrame(columns=list(neutral_signals), index=pd.DatetimeIndex([]))
+    return pd.DataFrame(series).ffill()
+
+
+def model_inputs(history):
+    # 모델 입력 범위로 정리한 이력 (없는 신호/초기 구간은 중립값)
+    filled = history.reindex(columns=list(neutral_signals)).fillna(neutral_signals)
+    filled['lw_strength'] = filled['lw_strength'].clip(0, 100)
+    filled['sentiment'] = filled['sentiment'].clip(0, 100)
+    filled['consensus'] = filled['consensus'].clip(1, 5)
+    return filled
+
+
+def latest_signals(history=None):
+    # 사이드바 기본값: 마지막 날짜의 신호 (이력이 없으면 중립값, as_of=None)
+    if history is None or history.empty:
+        return {**neutral_signals, 'as_of': None}
+    last = model_inputs(history).iloc[-1]
+    return {**{k: float(last[k]) for k in neutral_signals}, 'as_of': history.index[-1]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="시장 데이터 신호 파이프라인 (증분 갱신)")
+    parser.add_argument('--data-dir', default=default_signals_dir, help="prices / sentiment / consensus 파일 폴더")
+    parser.add_argument('--rebuild', action='store_true', help="캐시를 지우고 전체 이력을 다시 계산")
+    parser.add_argument('--out', help="신호 이력 저장 경로 (.csv / .parquet)")
+    for key, value in default_params.items():
+        parser.add_argument('--' + key.replace('_', '-'), type=type(value), default=value)
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        for name in sources:
+            cache_file = os.path.join(args.data_dir, cache_dir_name, name + '.npz')
+            if os.path.exists(cache_file):
+                os.unlink(cache_file)
+    start = time.perf_counter()
+    try:
+        history = signal_history(args.data_dir, {k: getattr(args, k) for k in default_params})
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    elapsed = (time.perf_counter() - start) * 1000
+    if history.empty:
+        print(f"{args.data_dir}: 읽을 수 있는 신호 파일(prices / sentiment / consensus)이 없습니다.", file=sys.stderr)
+        return 1
+
+    latest = latest_signals(history)
+    print(f"{len(history):,}일 ({history.index[0]:%Y-%m-%d} ~ {latest['as_of']:%Y-%m-%d}), 갱신 {elapsed:,.1f}ms")
+    print(f"  LW 변동성 돌파 강도 {latest['lw_strength']:.1f}   대중 심리 {latest['sentiment']:.1f}   애널리스트 컨센서스 {latest['consensus']:.2f}")
+    if args.out:
+        if args.out.endswith('.parquet'):
+            history.to_parquet(args.out)
+        else:
+            history.to_csv(args.out, encoding='utf-8-sig')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# 저장소 루트의 모듈(engine, batch_allocate 등)을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 앱/저장소 테스트가 실제 data/ 의 실행 기록과 시장 데이터를 건드리지 않도록 임시 경로 사용 (모듈 import 전에 설정)
+_tmp = tempfile.mkdtemp(prefix='pf_tests_')
+os.environ.setdefault('PF_RUNSTORE', os.path.join(_tmp, 'runs.sqlite'))
+os.environ.setdefault('PF_SIGNALS', os.path.join(_tmp, 'signals'))
@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+
+AppTest = pytest.importorskip('streamlit.testing.v1').AppTest
+
+app_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'investment_app.py')
+
+
+@pytest.fixture(scope='module')
+def app():
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_stylesheet_is_linked_not_inlined(app):
+    html = [m.value for m in app.markdown if 'app/static/' in m.value]
+    assert len(html) == 1
+    assert "<link rel='stylesheet' href='app/static/app.css?v=" in html[0]
+    assert not any('<style' in m.value for m in app.markdown)
+
+
+# 저장소에는 폰트 파일이 없으므로 CDN 스타일시트로 대체, 파일을 두면 로컬 스타일시트만 사용
+font_path = os.path.join(os.path.dirname(app_path), 'static', 'fonts', 'PretendardVariable.woff2')
+
+
+def style_html(at):
+    return next(m.value for m in at.markdown if 'app/static/app.css' in m.value)
+
+
+@pytest.mark.skipif(os.path.exists(font_path), reason="폰트 파일이 설치되어 있음")
+def test_font_falls_back_to_cdn_without_bundled_file(app):
+    html = style_html(app)
+    assert "href='https://cdn.jsdelivr.net/gh/orioncactus/pretendard/" in html
+    assert 'fonts/pretendard.css' not in html
+
+
+@pytest.mark.skipif(os.path.exists(font_path), reason="폰트 파일이 설치되어 있음")
+def test_bundled_font_replaces_cdn():
+    with open(font_path, 'wb'):
+        pass
+    try:
+        at = AppTest.from_file(app_path, default_timeout=120)
+        at.run()
+    finally:
+        os.remove(font_path)
+    html = style_html(at)
+    assert "href='app/static/fonts/pretendard.css?v=" in html
+    assert 'cdn.jsdelivr.net' not in html
+
+
+def test_slider_change_reruns_without_error(app):
+    app.sidebar.slider[0].set_value(85)
+    app.run()
+    assert not app.exception
+    assert "🚀 강력 돌파" in ' '.join(m.value for m in app.markdown)
+
+
+# 종목별 투자 이유: 유형이 번갈아 나오는 27개 종목 유니버스로 교체 (첫 종목 이름에 HTML 특수문자 포함)
+@pytest.fixture
+def rationale_app(tmp_path, monkeypatch):
+    import engine
+    import universe
+    names = ['R&D <Labs>'] + [f"Holding {i:02d}" for i in range(1, 27)]
+    weights = [100 * (27 - i) / 378 for i in range(27)]
+    kinds = ['Strategic (Core)' if i % 2 == 0 else 'Satellite' for i in range(27)]
+    path = str(tmp_path / 'u.csv')
+    pd.DataFrame({'name': names, 'weight': weights, 'type': kinds, 'rationale': [f"reason {i}" for i in range(27)]}).to_csv(path, index=False)
+    df = universe.load_universe(path)
+    monkeypatch.setattr(engine, 'load_universe', lambda: df)
+    monkeypatch.setattr(universe, 'universe_version', lambda: universe.default_universe_path + path)
+    at = AppTest.from_file(app_path, default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def rationale_html(at):
+    return ''.join(m.value for m in at.markdown if 'border-left: 3px solid #F59E0B' in m.value)
+
+
+def card_count(at):
+    return rationale_html(at).count('border-left: 3px solid #F59E0B')
+
+
+def test_rationale_last_page_is_partial(rationale_app):
+    at = rationale_app
+    caption = next(c.value for c in at.caption if c.value.startswith('총 '))
+    total = int(caption.split('개')[0][2:])
+    assert total > 27 and total % 10
+    assert card_count(at) == 10
+
+    pages = -(-total // 10)
+    at.number_input(key=f"rationale_page_{total}_10").set_value(pages)
+    at.run()
+    assert not at.exception
+    assert card_count(at) == total - (pages - 1) * 10
+    assert any(c.value == f"총 {total}개 중 {(pages - 1) * 10 + 1}~{total}번째 표시" for c in at.caption)
+
+
+def test_rationale_type_filter_and_search_combine(rationale_app):
+    at = rationale_app
+    at.multiselect[0].select('Satellite')
+    at.text_input[0].input('holding 1')
+    at.run()
+    assert not at.exception
+    shown = rationale_html(at)
+    # Satellite(홀수 번호) 이면서 이름에 'Holding 1' 이 들어간 종목만
+    assert card_count(at) == 5
+    for i in (11, 13, 15, 17, 19):
+        assert f"Holding {i}" in shown
+    assert 'Holding 12' not in shown and 'Holding 01' not in shown
+
+
+def test_rationale_card_escapes_html(rationale_app):
+    at = rationale_app
+    shown = rationale_html(at)
+    assert 'R&amp;D &lt;Labs&gt;' in shown
+    assert '<Labs>' not in shown
+
+    at.text_input[0].input('R&D <')
+    at.run()
+    assert card_count(at) == 1
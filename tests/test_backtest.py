@@ -0,0 +1,70 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+
+
+def write_minutes(path, days=3, per_day=30, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range('2024-01-02 09:00', periods=per_day, freq='min')
+    ts = ts.append([ts + pd.Timedelta(days=d) for d in range(1, days)])
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(ts)))
+    df = pd.DataFrame({'timestamp': ts, 'open': close + 0.05, 'high': close + 0.2, 'low': close - 0.2, 'close': close})
+    df.sample(frac=1, random_state=seed).to_csv(path, index=False)  # 시간순이 아닌 원본
+    return df
+
+
+def test_column_cache_is_sorted_and_chunked(tmp_path, monkeypatch):
+    monkeypatch.setattr(backtest, 'read_chunk_rows', 7)
+    monkeypatch.setattr(backtest, 'chunk_rows', 11)
+    src = write_minutes(tmp_path / 'AAA.csv')
+    cols = backtest.open_columns(str(tmp_path / 'AAA.csv'))
+    assert np.array_equal(cols['ts'], src['timestamp'].to_numpy('datetime64[s]').astype(np.int64))
+    assert np.allclose(cols['close'], src['close'])
+    cache_dir = tmp_path / backtest.cache_dir_name / 'AAA.csv'
+    assert not [f for f in os.listdir(cache_dir) if f.endswith('.tmp')]
+
+    day, o, h, l, c = backtest.daily_bars(cols)
+    assert len(day) == 3
+    first = src[src['timestamp'].dt.day == 2]
+    assert (o[0], h[0], l[0], c[0]) == pytest.approx((first['open'].iloc[0], first['high'].max(), first['low'].min(), first['close'].iloc[-1]))
+
+
+def test_interrupted_conversion_is_rebuilt(tmp_path, monkeypatch):
+    path = str(tmp_path / 'AAA.csv')
+    write_minutes(path)
+
+    def broken(path):
+        yield from list(backtest.pd.read_csv(path, chunksize=10))[:1]
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(backtest, 'read_chunks', broken)
+    with pytest.raises(KeyboardInterrupt):
+        backtest.open_columns(path)
+    cache_dir = os.path.join(str(tmp_path), backtest.cache_dir_name, 'AAA.csv')
+    assert os.listdir(cache_dir) == []
+
+    monkeypatch.undo()
+    assert len(backtest.open_columns(path)['ts']) == 90
+
+
+def test_missing_columns_raise_value_error(tmp_path):
+    pd.DataFrame({'date': ['2024-01-02'], 'close': [1.0]}).to_csv(tmp_path / 'BAD.csv', index=False)
+    with pytest.raises(ValueError, match='open'):
+        backtest.open_columns(str(tmp_path / 'BAD.csv'))
+
+
+def test_backtest_ignores_empty_days_without_warnings():
+    dates = pd.date_range('2024-01-02', periods=5)
+    panel = {c: np.full((5, 2), np.nan) for c in backtest.ohlc_columns}
+    for c, v in zip(backtest.ohlc_columns, (100.0, 103.0, 99.0, 102.0)):
+        panel[c][2:, 0] = v  # 첫 이틀은 두 종목 모두 거래 없음
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        equity, stats = backtest.run_backtest(dates, ['A', 'B'], panel)
+    assert np.isfinite(equity['portfolio']).all()
+    assert stats.loc['B', 'trades'] == 0
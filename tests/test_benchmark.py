@@ -0,0 +1,49 @@
+import json
+
+import benchmark
+import universe
+
+
+def fake_result(first_render_ms=50.0, wall_ms=100.0):
+    phase = {'wall_ms': wall_ms, 'first_render_ms': first_render_ms, 'stages_ms': {'model': 10.0}, 'peak_kb': {'model': 100.0}}
+    return {**{p: dict(phase) for p in benchmark.phases}, 'max_rss_kb': 1024}
+
+
+def test_update_baseline_is_written_even_when_first_render_target_is_missed(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(benchmark, 'measure', lambda path, repeat: fake_result(first_render_ms=900.0))
+    baseline = tmp_path / 'baseline.json'
+    code = benchmark.main(['--scenarios', 'small', '--update-baseline', '--baseline', str(baseline)])
+    assert code == 1
+    assert json.loads(baseline.read_text(encoding='utf-8'))['small']['cold']['first_render_ms'] == 900.0
+    assert '첫 화면 목표' in capsys.readouterr().out
+
+
+def test_compare_ignores_small_deltas_and_flags_large_ones():
+    base = {'small': fake_result(wall_ms=100.0)}
+    assert benchmark.compare({'small': fake_result(wall_ms=120.0)}, base, 0.5) == []
+    slow = benchmark.compare({'small': fake_result(wall_ms=400.0)}, base, 0.5)
+    assert ('small', 'cold', 'wall', 100.0, 400.0) in slow
+
+
+def test_baseline_from_another_machine_reports_but_does_not_fail(tmp_path, monkeypatch, capsys):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'small': fake_result(wall_ms=10.0), 'machine': {'cpu': 'elsewhere'}}), encoding='utf-8')
+    monkeypatch.setattr(benchmark, 'measure', lambda path, repeat: fake_result(wall_ms=400.0))
+    assert benchmark.main(['--scenarios', 'small', '--baseline', str(baseline)]) == 0
+    assert '참고용' in capsys.readouterr().out
+
+    baseline.write_text(json.dumps({'small': fake_result(wall_ms=10.0), 'machine': benchmark.machine_info()}), encoding='utf-8')
+    assert benchmark.main(['--scenarios', 'small', '--baseline', str(baseline)]) == 1
+
+
+def test_large_universe_is_loadable(tmp_path):
+    path = str(tmp_path / 'large.csv')
+    benchmark.write_large_universe(path, 2000)
+    assert len(universe.load_universe(path)) == 2000
+
+
+def test_same_machine_ignores_platform_string():
+    info = benchmark.machine_info()
+    assert benchmark.same_machine({**info, 'platform': 'Linux-6.1.0-other-kernel'}, info)
+    assert not benchmark.same_machine({**info, 'cpus': (info['cpus'] or 1) + 1}, info)
+    assert not benchmark.same_machine(None, info)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+import charts
+
+
+def test_aggregate_portfolio_keeps_totals():
+    n = 500
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(1, 100, n)
+    df_pf = pd.DataFrame({'종목': [f's{i}' for i in range(n)], '금액': amounts, '비중': amounts / amounts.sum() * 100,
+                          '유형': pd.Categorical(rng.choice(['Strategic (Core)', 'Tactical'], n))})
+    agg = charts.aggregate_portfolio(df_pf, top_n=20)
+    assert len(agg) == 20 + df_pf['유형'].nunique()
+    assert np.isclose(agg['금액'].sum(), amounts.sum())
+    assert np.isclose(agg['비중'].sum(), 100)
+    top = agg[agg['group'].isna()]
+    assert top['금액'].tolist() == sorted(amounts, reverse=True)[:20]
+    rest = df_pf[~df_pf['종목'].isin(top['종목'])]
+    for kind, amount in agg.dropna(subset=['group']).set_index('group')['금액'].items():
+        assert np.isclose(amount, rest.loc[rest['유형'] == kind, '금액'].sum())
+
+
+def test_small_portfolio_is_not_aggregated():
+    df_pf = pd.DataFrame({'종목': ['a', 'b'], '금액': [2.0, 1.0], '비중': [66.7, 33.3], '유형': ['Tactical', 'Buffer']})
+    agg = charts.aggregate_portfolio(df_pf)
+    assert agg['종목'].tolist() == ['a', 'b'] and agg['group'].isna().all()
+
+
+def make_portfolio(n, kinds=('Strategic (Core)', 'Tactical')):
+    amounts = np.arange(n, 0, -1, dtype=float)
+    return pd.DataFrame({'종목': [f's{i}' for i in range(n)], '금액': amounts, '비중': amounts / amounts.sum() * 100,
+                         '유형': pd.Categorical([kinds[i % len(kinds)] for i in range(n)])})
+
+
+def bar_count(fig):
+    return sum(len(trace.y) for trace in fig.data)
+
+
+def test_bar_count_switches_at_threshold():
+    n = charts.large_universe_threshold
+    assert bar_count(charts.portfolio_bar_figure(make_portfolio(n))) == n
+    assert bar_count(charts.portfolio_bar_figure(make_portfolio(n + 1))) == charts.top_n + 2
+
+
+def test_group_detail_caps_points():
+    n = charts.top_n + 2 * charts.max_detail_points + 10
+    fig = charts.group_detail_figure(make_portfolio(n), 'Tactical')
+    assert len(fig.data) == 1
+    assert len(fig.data[0].x) == len(fig.data[0].y) == charts.max_detail_points
+    assert fig.data[0].x[0] == charts.top_n + 1
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine
+from batch_allocate import main as batch_main, run_batch
+from universe import load_universe
+
+# 구간 경계를 모두 지나는 입력 조합
+lw_values = [0, 29.9, 30, 59.9, 60, 79.9, 80, 100]
+sentiment_values = [0, 20, 50, 80, 100]
+consensus_values = [1, 2.5, 3, 5]
+
+
+@pytest.fixture
+def clients():
+    grid = pd.MultiIndex.from_product([lw_values, sentiment_values, consensus_values], names=['lw_strength', 'sentiment', 'consensus']).to_frame(index=False)
+    return grid.assign(client_id=np.arange(len(grid)), capital=np.linspace(1e7, 5e9, len(grid)))
+
+
+def test_allocate_batch_matches_run_model(clients):
+    out = engine.allocate_batch(clients['capital'], clients['lw_strength'], clients['sentiment'], clients['consensus'])
+    for row, res in zip(clients.itertuples(), out.itertuples()):
+        tac, stra, df_pf = engine.run_model(row.capital, row.lw_strength, row.sentiment, row.consensus)
+        assert (res.tac_stock, res.tac_cash, res.str_stock, res.str_cash) == pytest.approx((tac[0], tac[1], stra[0], stra[1]))
+        assert (res.signal, res.stance) == (tac[2], stra[2])
+        amounts = out.loc[res.Index, df_pf['종목']].to_numpy(dtype=float)
+        assert np.allclose(amounts, df_pf['금액'])
+        assert amounts.sum() == pytest.approx(row.capital)
+
+
+def test_summary_only_batch_skips_holdings(clients):
+    full = engine.allocate_batch(clients['capital'], clients['lw_strength'], clients['sentiment'], clients['consensus'])
+    summary = engine.allocate_batch(clients['capital'], clients['lw_strength'], clients['sentiment'], clients['consensus'], holdings=False)
+    assert list(summary.columns) == engine.batch_summary_columns
+    pd.testing.assert_frame_equal(summary, full[engine.batch_summary_columns])
+
+
+def test_batch_cli_keeps_client_columns(clients, tmp_path):
+    clients.to_csv(tmp_path / 'clients.csv', index=False)
+    assert batch_main([str(tmp_path / 'clients.csv'), str(tmp_path / 'out.parquet')]) == 0
+    out = pd.read_parquet(tmp_path / 'out.parquet')
+    pd.testing.assert_frame_equal(out[clients.columns], clients)
+    assert list(out.columns[len(clients.columns):len(clients.columns) + len(engine.batch_summary_columns)]) == engine.batch_summary_columns
+    assert len(out.columns) == len(clients.columns) + len(engine.batch_summary_columns) + len(load_universe()) + 2
+
+
+def test_batch_requires_input_columns(clients):
+    with pytest.raises(ValueError, match='sentiment'):
+        run_batch(clients.drop(columns='sentiment'))
+
+
+def test_sweep_matches_scalar_model():
+    capitals = [1e8, 3.5e9]
+    surface = engine.sweep_allocation(capitals)
+    shape = (len(engine.lw_grid), len(engine.sentiment_grid), len(engine.consensus_grid))
+    assert surface['equity'].shape == (len(capitals),) + shape
+    assert np.allclose(surface['equity'] + surface['cash'], np.array(capitals)[:, None, None, None])
+    rng = np.random.default_rng(0)
+    for i, j, k in zip(*(rng.integers(0, n, 200) for n in shape)):
+        lw, sent, ana = engine.lw_grid[i], engine.sentiment_grid[j], engine.consensus_grid[k]
+        assert surface['tac_level'][i, j, k] == engine.tactical_level(lw)
+        assert surface['str_level'][i, j, k] == engine.strategic_level(sent, ana)
+        for c, capital in enumerate(capitals):
+            tac, stra, _ = engine.run_model(capital, lw, sent, ana)
+            assert surface['equity'][c, i, j, k] == pytest.approx(tac[0] + stra[0])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import montecarlo
+from engine import run_model
+
+
+@pytest.fixture(scope='module')
+def df_pf():
+    return run_model(1e8, 85, 30, 2)[2]
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with montecarlo.process_pool(2) as pool:
+        yield pool
+
+
+def project(df_pf, pool, workers=2, **kwargs):
+    return montecarlo.run_projection(df_pf, workers=workers, pool=pool, **kwargs)
+
+
+def test_projection_mean_matches_expected_growth(df_pf, pool):
+    years = 5
+    result = project(df_pf, pool, years=years, n_paths=40000, chunk_size=8000)
+    weights = (df_pf['금액'] / df_pf['금액'].sum()).to_numpy()
+    mu = montecarlo.holding_assumptions(df_pf)[0]
+    # 매수 후 보유(리밸런싱 없음)의 만기 기대 배수 = Σ w·exp(μT)
+    assert result['mean'] == pytest.approx(weights @ np.exp(mu * years), rel=0.02)
+    assert result['paths'] == 40000
+
+
+def test_projection_summary_is_consistent(df_pf, pool):
+    result = project(df_pf, pool, years=3, n_paths=10000, chunk_size=3000)
+    fan = np.array([result['fan'][p] for p in montecarlo.percentiles])
+    assert fan.shape == (len(montecarlo.percentiles), 3 * montecarlo.steps_per_year + 1)
+    assert np.all(np.diff(fan, axis=0) >= 0)
+    assert np.allclose(fan[:, 0], 1.0, rtol=0.01)
+    assert 0 <= result['prob_loss'] <= 1
+    assert result['cvar'][0.95] >= result['var'][0.95]
+    assert 0 <= result['mdd_median'] <= result['mdd_p95'] <= 1
+
+
+def test_projection_is_deterministic_across_workers(df_pf, pool):
+    a = project(df_pf, pool, workers=1, years=2, n_paths=5000, chunk_size=1000, seed=7)
+    b = montecarlo.run_projection(df_pf, workers=3, years=2, n_paths=5000, chunk_size=1000, seed=7)
+    assert a['mean'] == pytest.approx(b['mean'], rel=1e-12)
+    for p in montecarlo.percentiles:
+        assert np.array_equal(a['fan'][p], b['fan'][p])
+    assert a['mdd_median'] == b['mdd_median']
+
+
+def test_shared_pool_is_spawned_and_reused(df_pf, pool):
+    # fork 는 멀티스레드 서버에서 교착 위험이 있으므로 spawn, 실행이 끝나도 공유 풀은 닫지 않음
+    assert pool._mp_context.get_start_method() == 'spawn'
+    first = project(df_pf, pool, years=1, n_paths=2000, chunk_size=1000)
+    assert project(df_pf, pool, years=1, n_paths=2000, chunk_size=1000)['mean'] == pytest.approx(first['mean'])
+
+
+def test_factor_draws_match_explicit_correlation(df_pf):
+    # 단일 팩터 추출과 명시적 상관행렬(Cholesky) 경로는 같은 분포를 따라야 함
+    weights = (df_pf['금액'] / df_pf['금액'].sum()).to_numpy()
+    mu, vol, loading = montecarlo.holding_assumptions(df_pf)
+    chol = np.linalg.cholesky(montecarlo.factor_correlation(loading))
+    factor = montecarlo.simulate_chunk(weights, mu, vol, loading, None, 12, 50000, 1)
+    explicit = montecarlo.simulate_chunk(weights, mu, vol, loading, chol, 12, 50000, 2)
+    assert factor[2] / 50000 == pytest.approx(explicit[2] / 50000, rel=0.01)
+    terminal = [montecarlo.hist_quantile(r[0][-1], montecarlo.value_bins, q) for r in (factor, explicit) for q in (0.05, 0.5, 0.95)]
+    assert terminal[:3] == pytest.approx(terminal[3:], rel=0.02)
+
+
+def test_large_universe_needs_no_covariance(monkeypatch):
+    n = 3000
+    df_pf = pd.DataFrame({'종목': [f's{i}' for i in range(n)], '금액': np.ones(n), '유형': ['Strategic (Core)'] * n})
+
+    def no_dense(*args):
+        raise AssertionError("n x n 상관행렬을 만들면 안 됩니다")
+    monkeypatch.setattr(montecarlo, 'factor_correlation', no_dense)
+    monkeypatch.setattr(np.linalg, 'cholesky', no_dense)
+    weights = np.full(n, 1 / n)
+    mu, vol, loading = montecarlo.holding_assumptions(df_pf)
+    value_hist, _, terminal_sum, paths = montecarlo.simulate_chunk(weights, mu, vol, loading, None, 2, 500, 0)
+    assert paths == 500 and value_hist.sum() == 3 * 500
+    assert terminal_sum / paths == pytest.approx(np.exp(mu[0] * 2 / 12), rel=0.02)
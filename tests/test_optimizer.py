@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import optimizer
+
+
+@pytest.fixture
+def universe():
+    return pd.DataFrame({
+        'name': [f"S{i}" for i in range(8)],
+        'weight': np.array([3, 2, 2, 1, 1, 1, 4, 6], dtype=float) / 20,
+        'type': pd.Categorical(['Core'] * 6 + ['Tactical'] * 2),
+        'rationale': [''] * 8,
+    })
+
+
+@pytest.fixture
+def returns_path(tmp_path):
+    rng = np.random.default_rng(0)
+    names = [f"S{i}" for i in range(6)] + ['S7']  # S6 은 이력 없음
+    df = pd.DataFrame(rng.normal(0.0005, 0.02, (300, len(names))), columns=names)
+    df.insert(0, 'date', pd.bdate_range('2023-01-02', periods=300).strftime('%Y-%m-%d'))
+    path = tmp_path / 'returns.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('mode', list(optimizer.optimizer_modes))
+def test_names_without_history_keep_their_weight(universe, returns_path, mode):
+    out = optimizer.optimize_universe(universe, returns_path, mode, 0.0, 0.5)
+    assert list(out['name']) == list(universe['name'])
+    assert out['weight'].sum() == pytest.approx(1.0)
+    assert out.loc[out['name'] == 'S6', 'weight'].item() == pytest.approx(0.2)
+    assert (out['weight'] <= 0.5 + 1e-6).all()
+    assert optimizer.missing_returns(universe, returns_path) == ['S6']
+
+
+def test_group_caps_apply_to_the_whole_portfolio(universe, returns_path):
+    out = optimizer.optimize_universe(universe, returns_path, 'min_variance', 0.0, 1.0, {'Tactical': 0.25})
+    # Tactical = 고정 S6(0.2) + 최적화 S7 -> 합계가 한도 0.25 이하
+    assert out.loc[out['type'] == 'Tactical', 'weight'].sum() <= 0.25 + 1e-6
+
+
+def test_no_matching_history_raises(universe, tmp_path):
+    path = tmp_path / 'other.csv'
+    pd.DataFrame({'date': ['2024-01-02', '2024-01-03'], 'X': [0.01, -0.01]}).to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        optimizer.optimize_universe(universe, str(path))
+
+
+def test_caches_are_bounded(universe, returns_path, monkeypatch):
+    monkeypatch.setattr(optimizer, 'cache_size', 3)
+    for k in range(2, 8):
+        for upper in (0.6, 0.7, 0.8, 0.9, 1.0):
+            optimizer.optimize_universe(universe.iloc[:k], returns_path, 'min_variance', 0.0, upper)
+    assert len(optimizer._model_cache) == 3
+    assert len(optimizer._warm_starts) == 3
+
+
+def test_degenerate_history_raises_value_error(universe, tmp_path):
+    # 수익률이 모두 상수이면 공분산이 0 행렬 -> Cholesky 실패를 ValueError 로 변환
+    path = tmp_path / 'flat.csv'
+    pd.DataFrame({'date': ['2024-01-02', '2024-01-03', '2024-01-04'], 'S0': [0.01] * 3, 'S1': [0.0] * 3}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='flat.csv'):
+        optimizer.optimize_universe(universe, str(path))
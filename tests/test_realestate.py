@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import realestate
+from engine import run_model
+from montecarlo import factor_correlation, holding_assumptions, portfolio_moments
+
+
+def test_no_shocks_or_premiums_match_lognormal_median():
+    flat = dict(volatility=0.1, shock_prob=0.0, delay_prob=0.0, construction_premium=0.0, completion_premium=0.0)
+    _, price, rent = realestate.simulate_real_estate(100.0, 50000, seed=3, growth=0.05, **flat)
+    years = realestate.end_year - realestate.start_year
+    assert np.median(price[:, -1]) == pytest.approx(100 * np.exp((0.05 - 0.005) * years), rel=0.01)
+    assert (rent[:, 0] == 0).all() and (np.diff(rent, axis=1) > 0).all()
+
+
+def test_scenarios_are_reproducible_and_bands_ordered():
+    a = realestate.real_estate_scenarios(5e8, 5000, seed=1, financial=(1e8, 0.08, 0.2))
+    b = realestate.real_estate_scenarios(5e8, 5000, seed=1, financial=(1e8, 0.08, 0.2))
+    assert np.array_equal(a['price'][50], b['price'][50])
+    for key in ('price', 'total', 'financial', 'net_worth'):
+        lows = np.vstack([a[key][p] for p in realestate.band_percentiles])
+        assert (np.diff(lows, axis=0) >= 0).all()
+    assert 0 <= a['prob_below_start'] <= 1
+
+
+def test_portfolio_moments_closed_form_matches_full_covariance():
+    df_pf = run_model(1e8, 85, 30, 2)[2]
+    weights = (df_pf['금액'] / df_pf['금액'].sum()).to_numpy()
+    mu, vol, loading = holding_assumptions(df_pf)
+    cov = factor_correlation(loading) * np.outer(vol, vol)
+    expected = (weights @ mu, np.sqrt(weights @ cov @ weights))
+    assert portfolio_moments(df_pf) == pytest.approx(expected)
+
+
+def test_portfolio_moments_scales_to_large_universes():
+    n = 20000
+    df_pf = pd.DataFrame({'종목': [f"X{i}" for i in range(n)], '금액': np.ones(n), '유형': ['Strategic (Core)'] * n})
+    mu, sigma = portfolio_moments(df_pf)  # n x n 행렬(3.2GB)을 만들면 여기서 실패
+    assert mu == pytest.approx(0.10)
+    assert sigma == pytest.approx(np.sqrt((0.4 * 0.6) ** 2 + 0.4 ** 2 * (1 - 0.36) / n))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import rebalance
+from batch_allocate import run_batch, write_table
+from engine import cash_holding, tactical_holding
+from universe import load_universe
+
+cash = cash_holding['name']
+
+
+@pytest.fixture
+def clients():
+    return pd.DataFrame({'client_id': ['a', 'b'], 'age': [35, 72], 'customer_no': [1001, 1002],
+                         'capital': [1e8, 5e8], 'lw_strength': [85, 10], 'sentiment': [30, 90], 'consensus': [2, 5]})
+
+
+def test_numeric_client_columns_are_not_holdings(clients):
+    targets = rebalance.targets_from_allocations(run_batch(clients), 'client_id')
+    names = set(targets['name'])
+    assert names == set(load_universe()['name']) | {tactical_holding['name'], cash}
+    assert targets.groupby('account')['weight'].sum().to_numpy() == pytest.approx([1.0, 1.0])
+
+
+def test_allocations_without_summary_columns_are_rejected():
+    with pytest.raises(ValueError, match='stance'):
+        rebalance.targets_from_allocations(pd.DataFrame({'client_id': ['a'], 'x': [1.0]}), 'client_id')
+
+
+def test_orders_round_to_lots_and_keep_cash_floor():
+    positions = pd.DataFrame({'name': ['A', cash], 'quantity': [10, 1_000_000], 'price': [10_000, np.nan]})
+    prices = pd.DataFrame({'name': ['B'], 'price': [30_000], 'lot_size': [10]})
+    targets = pd.DataFrame({'name': ['A', 'B', cash], 'weight': [0.2, 0.6, 0.2]})
+    orders, summary = rebalance.generate_orders(positions, targets, prices, tolerance=0.0, min_trade=0)
+    b = orders.set_index('name').loc['B']
+    assert b['side'] == 'BUY' and b['quantity'] % 10 == 0
+    nav = summary['nav'].item()
+    assert summary['cash_after'].item() >= 0.2 * nav - 1e-6
+    assert set(orders['name']) <= {'A', 'B'}
+
+
+def test_unpriced_new_targets_are_reported():
+    positions = pd.DataFrame({'name': ['A', cash], 'quantity': [10, 1_000_000], 'price': [10_000, np.nan]})
+    targets = pd.DataFrame({'name': ['A', 'NEW', cash], 'weight': [0.5, 0.3, 0.2]})
+    assert rebalance.unpriced_targets(positions, targets) == ['NEW']
+    orders, _ = rebalance.generate_orders(positions, targets, tolerance=0.0, min_trade=0)
+    assert 'NEW' not in set(orders['name'])
+    assert rebalance.unpriced_targets(positions, targets, pd.DataFrame({'name': ['NEW'], 'price': [1.0]})) == []
+
+
+def test_cli_requires_account_column_with_allocations(tmp_path, clients, capsys):
+    write_table(run_batch(clients), tmp_path / 'alloc.csv')
+    pd.DataFrame({'name': ['A'], 'quantity': [1], 'price': [1.0]}).to_csv(tmp_path / 'pos.csv', index=False)
+    code = rebalance.main([str(tmp_path / 'pos.csv'), str(tmp_path / 'orders.csv'), '--allocations', str(tmp_path / 'alloc.csv')])
+    assert code == 1
+    assert 'account' in capsys.readouterr().err
+
+
+def test_cli_warns_about_unpriced_targets(tmp_path, capsys):
+    pd.DataFrame({'name': [cash], 'quantity': [1e8]}).to_csv(tmp_path / 'pos.csv', index=False)
+    assert rebalance.main([str(tmp_path / 'pos.csv'), str(tmp_path / 'orders.csv')]) == 0
+    assert '가격 정보가 없어 매수하지 않은' in capsys.readouterr().err
+
+
+def test_duplicate_price_names_are_rejected():
+    positions = pd.DataFrame({'name': ['A', cash], 'quantity': [10, 1_000_000], 'price': [10_000, np.nan]})
+    prices = pd.DataFrame({'name': ['B', 'A', 'B'], 'price': [30_000, 10_000, 31_000]})
+    targets = pd.DataFrame({'name': ['A', 'B', cash], 'weight': [0.2, 0.6, 0.2]})
+    with pytest.raises(ValueError, match='중복.*B'):
+        rebalance.generate_orders(positions, targets, prices)
+
+
+def test_new_target_prices_are_looked_up_by_name():
+    # 가격 파일의 행 순서가 book 과 달라도 종목명 기준으로 채워짐
+    positions = pd.DataFrame({'name': ['A', cash], 'quantity': [10, 1_000_000], 'price': [10_000, np.nan]})
+    prices = pd.DataFrame({'name': ['C', 'B', 'A'], 'price': [50_000, 30_000, 10_000], 'lot_size': [1, 10, 1]})
+    targets = pd.DataFrame({'name': ['A', 'B', 'C', cash], 'weight': [0.1, 0.3, 0.4, 0.2]})
+    orders, _ = rebalance.generate_orders(positions, targets, prices, tolerance=0.0, min_trade=0)
+    px = orders.set_index('name')['price']
+    assert px['B'] == 30_000 and px['C'] == 50_000
@@ -0,0 +1,72 @@
+import pytest
+
+import runstore
+from engine import run_model
+
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / 'runs.sqlite')
+
+
+def save(store, capital, lw, sent, ana, **extra):
+    tac, stra, df_pf = run_model(capital, lw, sent, ana)
+    inputs = {'capital': capital, 'lw_strength': lw, 'sentiment': sent, 'consensus': ana, **extra}
+    return runstore.save_run(inputs, tac, stra, df_pf, path=store)
+
+
+def count(store, table):
+    return int(runstore.query(f"SELECT COUNT(*) AS n FROM {table}", path=store)['n'].iloc[0])
+
+
+def test_same_inputs_are_stored_once(store):
+    run_id, inserted = save(store, 1e8, 85, 30, 2)
+    assert inserted
+    assert save(store, 1e8, 85, 30, 2) == (run_id, False)
+    runstore._known.pop(store)  # 새 프로세스에서도 DB 의 기본 키로 중복 제거
+    assert save(store, 1e8, 85, 30, 2) == (run_id, False)
+    assert count(store, 'runs') == 1
+
+
+def test_runs_with_the_same_portfolio_share_holdings(store):
+    # 같은 구간에 속하는 입력은 결과 포트폴리오가 같으므로 종목 행을 한 번만 저장
+    save(store, 1e8, 85, 30, 2)
+    save(store, 1e8, 90, 30, 2)
+    assert count(store, 'runs') == 2
+    assert count(store, 'holdings') == len(run_model(1e8, 85, 30, 2)[2])
+
+
+def test_compare_runs_reports_changed_holdings(store):
+    a, _ = save(store, 1e8, 85, 30, 2)
+    b, _ = save(store, 1e8, 10, 30, 2)
+    _, _, pf_a = run_model(1e8, 85, 30, 2)
+    _, _, pf_b = run_model(1e8, 10, 30, 2)
+    diff = runstore.compare_runs(a, b, path=store).set_index('name')
+    expected = pf_b.set_index('종목')['금액'].sub(pf_a.set_index('종목')['금액'], fill_value=0).loc[lambda d: d.abs() > 0.5]
+    assert sorted(diff.index) == sorted(expected.index)
+    assert diff['amount_diff'].to_dict() == pytest.approx(expected.to_dict())
+    assert runstore.compare_runs(a, a, path=store).empty
+
+
+def test_list_runs_and_history(store):
+    ids = [save(store, 1e8, lw, 50, 3)[0] for lw in (10, 40, 70, 90)]
+    assert runstore.list_runs(path=store)['run_id'].tolist() == ids[::-1]
+    assert runstore.list_runs(lw_strength=40, path=store)['run_id'].tolist() == [ids[1]]
+    with pytest.raises(ValueError):
+        runstore.list_runs(portfolio_id='x', path=store)
+    history = runstore.allocation_history(by='type', path=store)
+    assert history['run_id'].unique().tolist() == ids
+    assert history.groupby('run_id')['weight_pct'].sum().to_numpy() == pytest.approx(100)
+    by_name = runstore.allocation_history(by='name', top=3, path=store)
+    assert len(by_name) == 3 * len(ids)
+
+
+def test_projection_summaries_are_kept_per_params(store):
+    run_id, _ = save(store, 1e8, 85, 30, 2)
+    summary = {'mean': 1.5}
+    runstore.save_projection(run_id, 'montecarlo', {'years': 10}, summary, path=store)
+    runstore.save_projection(run_id, 'montecarlo', {'years': 10}, summary, path=store)
+    runstore.save_projection(run_id, 'montecarlo', {'years': 20}, summary, path=store)
+    out = runstore.run_projections(run_id, path=store)
+    assert sorted(p['years'] for p in out['params']) == [10, 20]
+    assert out['summary'].tolist() == [summary, summary]
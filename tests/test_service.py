@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import service
+from engine import run_model
+from universe import load_universe
+
+
+def call(method, path, payload):
+    async def go():
+        svc = service.create_service(load_universe(), window=0.001)
+        try:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            return await service.route(svc, method, path, body)
+        finally:
+            for executor in svc['pools']:
+                executor.shutdown(cancel_futures=True)
+    return asyncio.run(go())
+
+
+valid = {'capital': 1e8, 'lw_strength': 85, 'sentiment': 30, 'consensus': 2}
+
+
+@pytest.mark.parametrize('change', [
+    {'holdings': 'false'},
+    {'holdings': 1},
+    {'capital': '100'},
+    {'capital': True},
+    {'sentiment': 10 ** 400},
+    {'lw_strength': 101},
+])
+def test_parse_allocation_rejects_invalid_values(change):
+    with pytest.raises(ValueError):
+        service.parse_allocation({**valid, **change})
+
+
+@pytest.mark.parametrize('literal', [b'Infinity', b'NaN', b'-Infinity'])
+def test_non_finite_json_numbers_are_400(literal):
+    body = json.dumps({**valid, 'capital': 0}).encode('utf-8').replace(b'"capital": 0', b'"capital": ' + literal)
+    status, payload = call('POST', '/allocate', body)
+    assert status == 400 and 'capital' in payload['error']
+
+
+@pytest.mark.parametrize('change', [{'years': 'abc'}, {'years': 2.5}, {'paths': None}, {'years': 0}])
+def test_project_parameters_are_validated_like_allocate(change):
+    status, payload = call('POST', '/project', {**valid, **change})
+    assert status == 400
+    assert 'invalid literal' not in payload['error']
+
+
+def test_batched_allocation_matches_single_model():
+    batch = [service.parse_allocation({**valid, 'holdings': True}), service.parse_allocation({**valid, 'lw_strength': 10, 'sentiment': 90, 'consensus': 5})]
+    out = service.evaluate_batch(batch, load_universe())
+    for params, result in zip(batch, out):
+        tac, stra, df_pf = run_model(params['capital'], params['lw_strength'], params['sentiment'], params['consensus'])
+        assert (result['tac_stock'], result['tac_cash'], result['str_stock'], result['str_cash']) == pytest.approx((tac[0], tac[1], stra[0], stra[1]))
+        assert result['signal'] == tac[2] and result['stance'] == stra[2]
+    assert 'holdings' not in out[1]
+    _, _, df_pf = run_model(1e8, 85, 30, 2)
+    assert np.allclose([out[0]['holdings'][name] for name in df_pf['종목']], df_pf['금액'])
+
+
+def test_allocate_route_batches_concurrent_requests():
+    async def go():
+        svc = service.create_service(load_universe(), window=0.01)
+        try:
+            results = await asyncio.gather(*(service.route(svc, 'POST', '/allocate', json.dumps({**valid, 'capital': c}).encode('utf-8'))
+                                             for c in (1e8, 2e8, 3e8)))
+            return results, svc['stats']()
+        finally:
+            for executor in svc['pools']:
+                executor.shutdown(cancel_futures=True)
+    results, stats = asyncio.run(go())
+    assert [r[0] for r in results] == [200, 200, 200]
+    assert [r[1]['tac_stock'] for r in results] == pytest.approx([2e7, 4e7, 6e7])
+    assert stats['batches'] == 1 and stats['requests'] == 3
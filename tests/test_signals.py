@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import signals
+
+
+def write_sources(days, seed=0, rows_per_day=3):
+    # 분봉처럼 하루에 여러 행이 있는 원본 3종
+    rng = np.random.default_rng(seed)
+    stamps = [d + pd.Timedelta(minutes=m) for d in days for m in range(rows_per_day)]
+    close = 100 + np.cumsum(rng.normal(0, 1, len(stamps)))
+    prices = pd.DataFrame({'date': stamps, 'open': close, 'high': close + rng.uniform(0, 2, len(stamps)),
+                           'low': close - rng.uniform(0, 2, len(stamps)), 'close': close})
+    sentiment = pd.DataFrame({'date': stamps, 'value': rng.uniform(0, 100, len(stamps))})
+    consensus = pd.DataFrame({'date': stamps, 'rating': rng.integers(1, 6, len(stamps))})
+    return {'prices': prices, 'sentiment': sentiment, 'consensus': consensus}
+
+
+def save(data_dir, frames, mode='w'):
+    data_dir.mkdir(exist_ok=True)
+    for name, df in frames.items():
+        df.to_csv(data_dir / f'{name}.csv', index=False, mode=mode, header=(mode == 'w'))
+
+
+def cold(data_dir, frames, params):
+    # 캐시 없이 전체를 새로 계산한 결과
+    save(data_dir, frames)
+    return signals.signal_history(str(data_dir), params)
+
+
+def split(frames, at):
+    return {k: df.iloc[:at] for k, df in frames.items()}, {k: df.iloc[at:] for k, df in frames.items()}
+
+
+days = list(pd.date_range('2024-01-01', periods=60))
+
+
+@pytest.fixture(autouse=True)
+def fresh_states():
+    signals._states.clear()
+    yield
+    signals._states.clear()
+
+
+def test_append_matches_cold_rebuild(tmp_path):
+    frames = write_sources(days)
+    head, tail = split(frames, 100)  # 100 = 33일 + 1행 -> 마지막 날짜가 두 번에 걸쳐 들어옴
+    save(tmp_path / 'live', head)
+    signals.signal_history(str(tmp_path / 'live'))
+    save(tmp_path / 'live', tail, mode='a')
+    pd.testing.assert_frame_equal(signals.signal_history(str(tmp_path / 'live')), cold(tmp_path / 'cold', frames, None))
+
+
+def test_append_with_param_change_matches_cold_rebuild(tmp_path):
+    params = {'lw_k': 0.3, 'lw_lookback': 7, 'sentiment_window': 3, 'consensus_window': 11}
+    frames = write_sources(days, seed=1)
+    head, tail = split(frames, 120)
+    save(tmp_path / 'live', head)
+    signals.signal_history(str(tmp_path / 'live'))
+    save(tmp_path / 'live', tail, mode='a')
+    live = signals.signal_history(str(tmp_path / 'live'), params)
+    pd.testing.assert_frame_equal(live, cold(tmp_path / 'cold', frames, params))
+
+
+def test_cache_file_is_reused_across_processes(tmp_path):
+    frames = write_sources(days, seed=2)
+    save(tmp_path / 'live', frames)
+    first = signals.signal_history(str(tmp_path / 'live'))
+    signals._states.clear()  # 새 프로세스처럼 .npz 에서 다시 읽음
+    pd.testing.assert_frame_equal(signals.signal_history(str(tmp_path / 'live')), first)
+
+
+def test_split_day_consensus_averages_all_ratings(tmp_path):
+    data_dir = tmp_path / 'live'
+    data_dir.mkdir()
+    (data_dir / 'consensus.csv').write_text('date,rating\n2024-01-01,1\n2024-01-01,2\n')
+    signals.signal_history(str(data_dir))
+    with open(data_dir / 'consensus.csv', 'a') as f:
+        f.write('2024-01-01,5\n2024-01-02,4\n')
+    history = signals.signal_history(str(data_dir), {'consensus_window': 2})
+    assert history['consensus'].tolist() == pytest.approx([8 / 3, 12 / 4])
+
+
+def test_rewritten_file_is_rebuilt(tmp_path):
+    frames = write_sources(days, seed=3)
+    save(tmp_path / 'live', frames)
+    signals.signal_history(str(tmp_path / 'live'))
+    changed = {k: df.iloc[:50].assign(**{df.columns[1]: df[df.columns[1]].iloc[:50][::-1].to_numpy()}) for k, df in frames.items()}
+    save(tmp_path / 'live', changed)  # 앞부분이 바뀌고 길이도 짧아짐 -> 증분 갱신 불가
+    pd.testing.assert_frame_equal(signals.signal_history(str(tmp_path / 'live')), cold(tmp_path / 'cold', changed, None))
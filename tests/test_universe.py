@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import universe
+
+
+def write(path, rows):
+    pd.DataFrame(rows, columns=universe.universe_columns).to_csv(path, index=False)
+    return str(path)
+
+
+def test_percent_weights_and_defaults(tmp_path):
+    path = write(tmp_path / 'u.csv', [['A', 50, 'Strategic (Core)', 'a'], ['B', 25, None, None], ['C', 25, 'Tactical', 'c']])
+    df = universe.load_universe(path)
+    assert df['weight'].tolist() == pytest.approx([0.5, 0.25, 0.25])
+    assert df['type'].tolist() == ['Strategic (Core)', 'Strategic (Core)', 'Tactical']
+    assert df['rationale'].tolist() == ['a', '', 'c']
+
+
+def test_shipped_universe_sums_to_one():
+    raw = universe.read_universe(universe.default_universe_path)
+    assert abs(raw['weight'].sum() - 1) <= universe.weight_tolerance
+
+
+def test_cached_until_file_changes(tmp_path):
+    path = write(tmp_path / 'u.csv', [['A', 1, 'Tactical', '']])
+    first = universe.load_universe(path)
+    assert universe.load_universe(path) is first
+    write(path, [['A', 0.5, 'Tactical', ''], ['B', 0.5, 'Tactical', '']])
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert universe.load_universe(path)['name'].tolist() == ['A', 'B']
+
+
+@pytest.mark.parametrize('rows, message', [
+    ([['A', 0.5, 'Tactical', ''], ['A', 0.5, 'Tactical', '']], '중복'),
+    ([['A', -1, 'Tactical', ''], ['B', 2, 'Tactical', '']], '0 이상'),
+    ([['A', np.nan, 'Tactical', '']], '0 이상'),
+    ([['A', 0, 'Tactical', '']], '합계'),
+    ([['A', 9, 'Tactical', ''], ['B', 0.5, 'Tactical', '']], '합계가 9.5'),
+    ([['A', 0.3, 'Tactical', ''], ['B', 0.2, 'Tactical', '']], '합계가 0.5'),
+    ([[None, 1, 'Tactical', '']], '비어'),
+])
+def test_invalid_universe_is_rejected(tmp_path, rows, message):
+    with pytest.raises(ValueError, match=message):
+        universe.load_universe(write(tmp_path / 'u.csv', rows))
+
+
+def test_parquet_universe_matches_csv(tmp_path):
+    rows = [['A', 0.75, 'Strategic (Core)', 'a'], ['B', 0.25, 'Buffer', 'b']]
+    csv = universe.load_universe(write(tmp_path / 'u.csv', rows))
+    pd.DataFrame(rows, columns=universe.universe_columns).to_parquet(tmp_path / 'u.parquet', index=False)
+    pd.testing.assert_frame_equal(universe.load_universe(str(tmp_path / 'u.parquet')), csv)
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# --- 종목 유니버스 로더 ---
+# 보유 종목(name, weight, type, rationale)은 CSV/Parquet 파일로 관리합니다.
+# 로드 결과는 프로세스 전역에 캐시되어 세션 간에 공유되며, 파일 수정 시각이 바뀌면 다시 읽습니다.
+
+# PF_UNIVERSE 환경 변수로 다른 유니버스 파일을 지정할 수 있습니다 (벤치마크 등)
+default_universe_path = os.environ.get('PF_UNIVERSE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'core_stocks.csv')
+universe_columns = ['name', 'weight', 'type', 'rationale']
+weight_tolerance = 1e-6
+weight_totals = (1.0, 100.0)  # 비중은 소수(합계 1) 또는 백분율(합계 100) 으로 적습니다
+
+_universe_cache = {}
+
+
+def universe_version(path=default_universe_path):
+    return os.path.getmtime(path)
+
+
+def read_universe(path):
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path, columns=universe_columns)
+    return pd.read_csv(path, usecols=universe_columns, dtype={'name': str, 'weight': np.float64, 'type': str, 'rationale': str})
+
+
+def validate_universe(df, path):
+    if df['name'].isna().any():
+        raise ValueError(f"{path}: 종목명이 비어 있는 행이 있습니다.")
+    dup = df['name'][df['name'].duplicated()]
+    if len(dup):
+        raise ValueError(f"{path}: 중복된 종목이 있습니다: {', '.join(dup.head(5))}")
+    if df['weight'].isna().any() or (df['weight'] < 0).any():
+        raise ValueError(f"{path}: 비중은 0 이상의 숫자여야 합니다.")
+    # 합계가 1(또는 100)이 아니면 행이 빠졌거나 잘못 입력된 파일일 수 있으므로 조용히 재조정하지 않고 거부
+    total = df['weight'].sum()
+    if not any(abs(total - expected) <= weight_tolerance * expected for expected in weight_totals):
+        raise ValueError(f"{path}: 비중 합계가 {total:g} 입니다. 합계는 1 (또는 100) 이어야 합니다 - 누락되거나 잘못된 행이 없는지 확인하세요.")
+
+
+def load_universe(path=default_universe_path):
+    mtime = universe_version(path)
+    hit = _universe_cache.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+
+    df = read_universe(path)
+    validate_universe(df, path)
+    # 비중은 합계 1로 맞춤 (백분율 입력과 반올림 오차 정리, 기존의 '/ 0.95' 고정 보정 대체), 유형은 범주형으로 압축
+    universe = pd.DataFrame({
+        'name': df['name'].to_numpy(),
+        'weight': (df['weight'] / df['weight'].sum()).to_numpy(),
+        'type': df['type'].fillna('Strategic (Core)').astype('category'),
+        'rationale': df['rationale'].fillna('').to_numpy(),
+    })
+    _universe_cache[path] = (mtime, universe)
+    return universe